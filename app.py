@@ -3,20 +3,23 @@
 import streamlit as st
 import os
 import json
-import re
 from dotenv import load_dotenv
-import cohere
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
 import copy
+import uuid
+import logging
+import threading
 from datetime import datetime
 
-# --- Correct imports for gspread ---
-import gspread
-from google.oauth2.service_account import Credentials
+# Heavy dependencies (cohere, pydantic via resume_json/generation, jinja2, weasyprint) are imported
+# on the pages that use them, and warmed in the background after the first page has been sent.
+from feedback import FeedbackPipeline, JsonlSink, SheetsSink
+from generation_cache import GenerationCache
+from metrics import metrics, start_exporters_from_env, timed_import, SIZE_BUCKETS
+from renderer import RenderService, RenderQueueFull, RenderSuperseded, PdfCache, HAS_RASTERIZER, get_template_registry, rasterize_pdf, sample_data, templates
 
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+logger = logging.getLogger(__name__)
 st.set_page_config(page_title="ResumeCraft AI", page_icon="✨", layout="wide")
 
 # --- Helper Functions ---
@@ -28,18 +31,195 @@ def load_api_key():
         return os.getenv("COHERE_API_KEY")
 
 @st.cache_resource
-def get_cohere_client(_api_key): return cohere.Client(_api_key)
+def get_cohere_client(_api_key): return timed_import("cohere").Client(_api_key)
 
-def html_to_pdf(html_string): return HTML(string=html_string).write_pdf()
+def require_ai_client():
+    # Only generation needs the AI key, so a missing key stops this action, not the whole app.
+    api_key = load_api_key()
+    if not api_key:
+        st.error("❌ COHERE_API_KEY not found. Please set it in your environment or Streamlit secrets.")
+        st.stop()
+    return get_cohere_client(api_key)
 
-def extract_json_from_text(text):
-    match = re.search(r"```json\s*(\{.*?\})\s*```", text, re.DOTALL)
-    if match: return match.group(1)
-    match = re.search(r"(\{.*?\})", text, re.DOTALL)
-    if match: return match.group(1)
-    st.warning("Could not find a JSON block in the AI's response. Displaying raw text.")
-    st.code(text)
-    return None
+WARMUP_MODULES = ["cohere", "resume_json", "generation", "jinja2"]
+
+@st.cache_resource
+def start_background_warmup():
+    # Runs once per process, after the first page is out: imports what later pages need and starts the render workers.
+    render_service = get_render_service()  # Cheap to construct; warm_up() starts a single worker process.
+    def warm():
+        for module_name in WARMUP_MODULES:
+            try: timed_import(module_name)
+            except Exception: logger.warning("Warm-up import of %s failed", module_name, exc_info=True)
+        get_template_registry()
+        render_service.warm_up()
+    threading.Thread(target=warm, name="warmup", daemon=True).start()
+    return True
+
+# When enabled, the templates page previews the Jinja render only and builds the PDF on request.
+LAZY_PDF = os.getenv("LAZY_PDF", "1") == "1"
+# "raster" shows an image of the generated PDF once it exists (exactly what downloads); "html" always embeds the HTML.
+PREVIEW_MODE = os.getenv("PREVIEW_MODE", "raster" if HAS_RASTERIZER else "html")
+
+@st.cache_resource
+def get_pdf_cache(): return PdfCache()
+
+@st.cache_resource
+def get_render_service(): return RenderService()
+
+# Demo cards depend only on sample_data and the template file, so the version argument is the cache key.
+@st.cache_data(max_entries=16)
+def render_demo_html(template_name, template_version):
+    filename, color = templates[template_name]
+    html_out = get_template_registry().render(filename, sample_data, accent_color=color)
+    return f'<div style="background-color:white; border-radius: 8px; padding: 25px; border: 1px solid #ddd;">{html_out}</div>'
+
+def get_demo_html(template_name):
+    return render_demo_html(template_name, get_template_registry().version(templates[template_name][0]))
+
+def get_render_session_key():
+    # Identifies this browser session to the render pool, so a newer render supersedes an older one.
+    if "render_session_key" not in st.session_state: st.session_state.render_session_key = uuid.uuid4().hex
+    return st.session_state.render_session_key
+
+def html_to_pdf(html_string, on_wait=None, template=None):
+    cache = get_pdf_cache()
+    key = cache.key_for(html_string)
+    pdf_bytes = cache.get(key)
+    metrics.inc("pdf_cache_lookups_total", result="miss" if pdf_bytes is None else "hit")
+    if pdf_bytes is None:
+        with metrics.span("pdf_render", template=template):
+            pdf_bytes = get_render_service().render(html_string, session_key=get_render_session_key(), on_wait=on_wait)
+        metrics.observe("pdf_bytes", len(pdf_bytes), SIZE_BUCKETS, template=template)
+        cache.put(key, pdf_bytes)
+    return pdf_bytes
+
+def get_pdf_preview(html_string):
+    # The preview image is stored in the PDF cache next to its PDF; None until that PDF has been built.
+    if PREVIEW_MODE != "raster": return None
+    cache = get_pdf_cache()
+    key = cache.key_for(html_string)
+    preview = cache.peek(key + ":preview")
+    if preview is None:
+        pdf_bytes = cache.peek(key)
+        if pdf_bytes is None: return None
+        try: preview = rasterize_pdf(pdf_bytes)
+        except Exception: return None  # Fall back to the HTML preview rather than break the page.
+        cache.put(key + ":preview", preview)
+    return preview
+
+def html_variants_to_pdf(html_strings, on_wait=None):
+    # Every variant not already cached is its own pool job, so they render in parallel; each PDF is cached individually.
+    cache = get_pdf_cache()
+    keys = [cache.key_for(html_string) for html_string in html_strings]
+    pdfs = [cache.get(key) for key in keys]
+    missing = [i for i, pdf_bytes in enumerate(pdfs) if pdf_bytes is None]
+    if missing:
+        with metrics.span("pdf_render_batch"):
+            rendered = get_render_service().render_many([html_strings[i] for i in missing],
+                                                        session_key=get_render_session_key() + ":compare", on_wait=on_wait)
+        for i, pdf_bytes in zip(missing, rendered):
+            pdfs[i] = pdf_bytes
+            cache.put(keys[i], pdf_bytes)
+    return pdfs
+
+def with_progress(render, html, label="Preparing your PDF...", **kwargs):
+    progress = st.progress(0.0, text=label)
+    def on_wait(elapsed, timeout): progress.progress(min(elapsed / timeout, 0.99), text=f"{label} ({elapsed:.0f}s)")
+    try: return render(html, on_wait=on_wait, **kwargs)
+    finally: progress.empty()
+
+def html_to_pdf_with_progress(html_string, template=None): return with_progress(html_to_pdf, html_string, template=template)
+
+# --- Compare Mode ---
+COMPARE_PALETTE = ["#2c3e50", "#3498db", "#8c7853", "#bcaaa4", "#16a085", "#c0392b", "#8e44ad", "#d35400"]
+
+def build_compare_variants(resume_data, template_name, compare_by, colors):
+    # Returns (label, template name, accent color, html) for each variant; Jinja only, no PDF yet.
+    if compare_by == "All templates":
+        combos = [(name, name, color) for name, (_, color) in templates.items()]
+    else:
+        combos = [(color, template_name, color) for color in colors]
+    registry = get_template_registry()
+    return [(label, name, color, registry.render(templates[name][0], resume_data, accent_color=color)) for label, name, color in combos]
+
+def show_comparison(variants):
+    if not variants:
+        st.info("Pick at least one color to compare.")
+        return
+    pdf_cache = get_pdf_cache()
+    if not all(pdf_cache.peek(PdfCache.key_for(html)) for *_, html in variants):
+        if st.button(f"⚡ Render all {len(variants)} as PDFs", use_container_width=True):
+            with_progress(html_variants_to_pdf, [html for *_, html in variants], label=f"Rendering {len(variants)} variants...")
+    for row_start in range(0, len(variants), 2):
+        for col, (label, name, color, html) in zip(st.columns(2), variants[row_start:row_start + 2]):
+            with col:
+                st.markdown(f"**{label}**")
+                thumbnail = get_pdf_preview(html)
+                if thumbnail: st.image(thumbnail, use_container_width=True)
+                else: st.components.v1.html(f'<div style="background-color:white; zoom:0.45;">{html}</div>', height=380, scrolling=False)
+                ready = pdf_cache.peek(PdfCache.key_for(html)) is not None
+                st.button("✅ Use this" + (" (PDF ready)" if ready else ""), key=f"use_{name}_{color}", use_container_width=True,
+                          on_click=lambda n=name, c=color: st.session_state.update(template_select=n, color_picker=c, compare_mode=False))
+
+# Bump PROMPT_VERSION whenever the generation prompt changes, so cached generations from the old prompt are not reused.
+GENERATION_MODEL = "command-r"
+GENERATION_TEMPERATURE = 0.2
+PROMPT_VERSION = 2
+# "sections" streams one job per resume section concurrently; "single" streams one prompt for the whole resume.
+GENERATION_MODE = os.getenv("GENERATION_MODE", "sections")
+
+@st.cache_resource
+def get_generation_cache(): return GenerationCache()
+
+def generate_resume_single(client, user_data, on_update):
+    from generation import parse_streamed_reply, stream_json_reply
+    from resume_json import validate_resume
+    user_details_str = json.dumps(user_data, indent=2)
+    json_prompt = f"""
+    Based on the user's details, generate a resume in a clean JSON format.
+
+    **Instructions:**
+    1.  Create a concise, professional `profile_summary` (2-3 sentences) tailored to the `target_role` and `job_description` if provided.
+    2.  For the `projects` and `experience` sections, first **enhance** the user-provided bullet points in the `details` field. Rewrite them to be more professional using strong action verbs and quantifying results.
+    3.  After enhancing, parse the content into the specified JSON structure.
+    4.  Parse `education_input` into a list of objects, each with `degree`, `institution`, and `year`.
+    5.  Parse `skills_input` into a simple list of strings.
+    6.  IMPORTANT: The order of entries in the 'projects' and 'experience' arrays MUST be preserved from the user's input. Do not reorder them.
+    7.  The final output MUST be a single JSON object enclosed in ```json ... ```.
+
+    **JSON Schema to follow:**
+    {{"name": "string", "email": "string", "profile_summary": "string", "education": [{{"degree": "string", "institution": "string", "year": "string"}}], "skills": ["string", "string", ...], "projects": [{{"name": "string", "details": ["string", "string", ...]}}], "experience": [{{"title": "string", "company": "string", "duration": "string", "details": ["string", ...]}}]}}
+
+    **User's Details:**
+    {user_details_str}
+    """
+    # Sections surface in the live preview as soon as the incremental parser has them.
+    reply = stream_json_reply(client, json_prompt, GENERATION_MODEL, GENERATION_TEMPERATURE, on_update, section="full")
+    with metrics.span("json_extract", section="full"): return validate_resume(parse_streamed_reply(*reply))
+
+def show_live_preview(placeholder, data):
+    with placeholder.container(border=True):
+        st.caption("✍️ Live preview — sections appear as the AI finishes them.")
+        if data.get("name"): st.markdown(f"#### {data['name']}")
+        if data.get("profile_summary"): st.write(data["profile_summary"])
+        if data.get("skills"): st.markdown("**Skills:** " + ", ".join(str(skill) for skill in data["skills"]))
+        for section, title_key in (("projects", "name"), ("experience", "title")):
+            for entry in data.get(section, []):
+                if not isinstance(entry, dict): continue
+                st.markdown(f"**{entry.get(title_key, '')}**")
+                for line in entry.get("details", []): st.markdown(f"- {line}")
+
+@st.cache_resource
+def get_feedback_pipeline():
+    # FEEDBACK_SINK=local writes feedback to a local JSONL file instead of the sheet (for development only:
+    # the file does not survive a redeploy). Missing credentials are an error, not a silent switch to that file.
+    if os.getenv("FEEDBACK_SINK") == "local": return FeedbackPipeline(JsonlSink())
+    try: credentials_info = st.secrets["gspread_credentials"]
+    except (KeyError, FileNotFoundError):
+        logger.error("Feedback cannot be delivered: gspread_credentials is missing from Streamlit secrets.")
+        raise RuntimeError("Feedback system error: Google Sheets credentials are not configured.")
+    return FeedbackPipeline(SheetsSink(credentials_info, "ResumeCraft-Feedback", "Sheet1"))  # Remember to use your real sheet name
 
 # --- UI Components (Header, Footer, Feedback) ---
 def show_persistent_header():
@@ -141,14 +321,6 @@ def display_feedback_dialog():
 
         if st.button("Submit Feedback", use_container_width=True, type="primary"):
             try:
-                scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-                creds = Credentials.from_service_account_info(
-                    st.secrets["gspread_credentials"], scopes=scopes
-                )
-                client = gspread.authorize(creds)
-                
-                sheet = client.open("ResumeCraft-Feedback").worksheet("Sheet1") # Remember to use your real sheet name
-                
                 new_row = [
                     datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     clarity_rating,
@@ -157,14 +329,9 @@ def display_feedback_dialog():
                     would_recommend,
                     improvement_suggestion
                 ]
-                
-                sheet.append_row(new_row)
+                # Spooled locally and sent to the sheet in batches by a background thread.
+                get_feedback_pipeline().submit(new_row)
                 st.toast("Thank you!", icon="🎉")
-                
-            except gspread.exceptions.SpreadsheetNotFound:
-                st.error("Feedback system error: The Google Sheet was not found. Please check the sheet name.")
-            except gspread.exceptions.APIError:
-                st.error("Feedback system error: A Google API error occurred. Likely a permissions issue.")
             except Exception as e:
                 st.error(f"Could not submit feedback. Error: {e}")
             
@@ -188,28 +355,11 @@ def show_footer():
     """, unsafe_allow_html=True)
 
 # --- App Initialization ---
-api_key = load_api_key()
-if not api_key:
-    st.error("❌ COHERE_API_KEY not found. Please set it in your environment or Streamlit secrets.")
-    st.stop()
-co = get_cohere_client(api_key)
-
 show_persistent_header()
 
-# --- Data Dictionaries, State, and Routing ---
-templates = {
-    "Corporate": ("template_oldmoney.html", "#8c7853"), "Modern": ("template_twocol.html", "#3498db"),
-    "Aesthetic": ("template_aesthetic.html", "#bcaaa4"), "Classic": ("template.html", "#2c3e50")
-}
-sample_data = {
-    "name": "Alex Taylor", "email": "alex.taylor@email.com",
-    "profile_summary": "Innovative Computer Science graduate passionate about developing scalable web applications and working with cutting-edge AI technologies.",
-    "education": [{"degree": "B.S. in Computer Science", "institution": "University of Technology", "year": "2024"}],
-    "skills": ["Python", "JavaScript", "React", "Node.js", "SQL", "Docker", "AWS", "Machine Learning"],
-    "projects": [{"name": "AI-Powered Task Manager", "details": ["Developed a full-stack web app that uses natural language processing to categorize and prioritize tasks.", "Built a RESTful API with Node.js and Express for data handling."]}],
-    "experience": [{"title": "Software Development Intern", "company": "Innovatech Solutions", "duration": "Summer 2023", "details": ["Contributed to the development of a client-facing analytics dashboard, increasing user engagement by 15%."]}]
-}
+start_exporters_from_env()  # Serves /metrics when METRICS_PORT is set; once per process.
 
+# --- State and Routing ---
 if 'user_data' not in st.session_state: st.session_state.user_data = {}
 if 'resume_data' not in st.session_state: st.session_state.resume_data = {}
 if 'feedback_triggered' not in st.session_state: st.session_state.feedback_triggered = False
@@ -235,7 +385,7 @@ if page == "builder":
         st.subheader("Your Content")
         education_input = st.text_area("🎓 Education (e.g., 'B.S. in Computer Science - University of Tech - 2024')", ud.get("education_input", ""), height=100)
         skills_input = st.text_area("🛠️ Skills (Comma-separated, e.g., 'Python, JavaScript, React')", ud.get("skills_input", ""), height=100)
-        projects_input = st.text_area("💼 Projects / Internships", ud.get("projects_input", ""), height=150)
+        projects_input = st.text_area("💼 Projects / Internships (one per line as 'Name: description', or a name followed by '- ' bullet points; blank line between projects)", ud.get("projects_input", ""), height=150)
 
         with st.expander("🧾 Work Experience (Optional)"):
             experience_input = st.text_area("Work experience details", ud.get("experience_input", ""))
@@ -251,36 +401,37 @@ if page == "builder":
                     "skills_input": skills_input, "projects_input": projects_input,
                     "experience_input": experience_input
                 }
+                from generation import generate_resume_sections
+                from resume_json import StreamParseError
+                generation_cache = get_generation_cache()
+                generation_key = generation_cache.key_for(st.session_state.user_data, f"{PROMPT_VERSION}:{GENERATION_MODE}", GENERATION_MODEL, GENERATION_TEMPERATURE)
+                cached_resume = generation_cache.get(generation_key)
+                if cached_resume:
+                    st.session_state.resume_data = cached_resume
+                    st.query_params["page"] = "review"
+                    st.rerun()
+                co = require_ai_client()
                 with st.spinner("AI is crafting and enhancing your resume..."):
                     try:
-                        user_details_str = json.dumps(st.session_state.user_data, indent=2)
-                        json_prompt = f"""
-                        Based on the user's details, generate a resume in a clean JSON format.
-
-                        **Instructions:**
-                        1.  Create a concise, professional `profile_summary` (2-3 sentences) tailored to the `target_role` and `job_description` if provided.
-                        2.  For the `projects` and `experience` sections, first **enhance** the user-provided bullet points in the `details` field. Rewrite them to be more professional using strong action verbs and quantifying results.
-                        3.  After enhancing, parse the content into the specified JSON structure.
-                        4.  Parse `education_input` into a list of objects, each with `degree`, `institution`, and `year`.
-                        5.  Parse `skills_input` into a simple list of strings.
-                        6.  IMPORTANT: The order of entries in the 'projects' and 'experience' arrays MUST be preserved from the user's input. Do not reorder them.
-                        7.  The final output MUST be a single JSON object enclosed in ```json ... ```.
-
-                        **JSON Schema to follow:**
-                        {{"name": "string", "email": "string", "profile_summary": "string", "education": [{{"degree": "string", "institution": "string", "year": "string"}}], "skills": ["string", "string", ...], "projects": [{{"name": "string", "details": ["string", "string", ...]}}], "experience": [{{"title": "string", "company": "string", "duration": "string", "details": ["string", ...]}}]}}
-
-                        **User's Details:**
-                        {user_details_str}
-                        """
-                        response = co.chat(model='command-r', message=json_prompt, temperature=0.2)
-                        json_string = extract_json_from_text(response.text)
-
-                        if not json_string:
+                        live_preview = st.empty()
+                        def on_update(data): show_live_preview(live_preview, data)
+                        if GENERATION_MODE == "sections":
+                            resume_data = generate_resume_sections(
+                                co, st.session_state.user_data, GENERATION_MODEL, GENERATION_TEMPERATURE, PROMPT_VERSION,
+                                cache=generation_cache, on_update=on_update
+                            )
+                        else:
+                            resume_data = generate_resume_single(co, st.session_state.user_data, on_update)
+
+                        if not resume_data:
                             st.error("AI failed to generate valid JSON. Please try adjusting your input.")
                         else:
-                            st.session_state.resume_data = json.loads(json_string)
+                            generation_cache.put(generation_key, resume_data)
+                            st.session_state.resume_data = resume_data
                             st.query_params["page"] = "review"
                             st.rerun()
+                    except StreamParseError as e:
+                        st.error(f"The AI response was not valid JSON, so generation was stopped. Please try again. ({e})")
                     except Exception as e:
                         st.error(f"An error occurred during AI generation: {e}")
     show_footer()
@@ -352,29 +503,51 @@ elif page == "templates":
             template_name = st.selectbox("Select a template:", templates.keys(), key="template_select")
             default_color = templates[template_name][1]
             accent_color = st.color_picker("Select an accent color:", default_color, key="color_picker")
+            compare_mode = st.toggle("🔀 Compare side by side", key="compare_mode")
+            if compare_mode:
+                compare_by = st.radio("Compare:", ["All templates", "Accent colors"], horizontal=True, key="compare_by")
+                compare_colors = []
+                if compare_by == "Accent colors":
+                    palette = list(dict.fromkeys([accent_color] + COMPARE_PALETTE))
+                    compare_colors = st.multiselect("Colors to compare:", palette, default=palette[:4], key="compare_colors")
             try:
                 template_filename = templates[template_name][0]
-                env = Environment(loader=FileSystemLoader(BASE_DIR))
-                template = env.get_template(template_filename)
-                html_out = template.render(st.session_state.resume_data, accent_color=accent_color)
-                pdf_bytes = html_to_pdf(html_out)
-                
-                if st.download_button(
+                html_out = get_template_registry().render(template_filename, st.session_state.resume_data, accent_color=accent_color)
+                if LAZY_PDF:
+                    # Only a PDF already built for this exact render is offered; otherwise wait for the user to ask.
+                    pdf_bytes = get_pdf_cache().peek(PdfCache.key_for(html_out))
+                    if pdf_bytes is None and st.button("🛠️ Prepare PDF", use_container_width=True):
+                        pdf_bytes = html_to_pdf_with_progress(html_out, template_name)
+                else:
+                    pdf_bytes = html_to_pdf_with_progress(html_out, template_name)
+
+                if pdf_bytes is not None and st.download_button(
                     label="📥 Download PDF", data=pdf_bytes,
                     file_name=f"{st.session_state.resume_data.get('name', 'resume').replace(' ', '_')}_Resume.pdf",
                     mime="application/pdf", use_container_width=True,
                     on_click=lambda: st.session_state.update(feedback_triggered=True)
                 ):
                     pass
-                    
+
+            except (RenderQueueFull, RenderSuperseded, TimeoutError) as e:
+                st.warning(f"⏳ {e}")
             except Exception as e:
                 st.error(f"❌ An error occurred during PDF generation: {e}")
                 html_out = f"<h3>Error rendering template:</h3><p>{e}</p>"
         with preview_col:
-            st.subheader("📄 Preview")
-            if 'html_out' in locals() and html_out:
-                styled_preview = f'<div style="background-color:white; border-radius: 8px; padding: 25px; border: 1px solid #ddd;">{html_out}</div>'
-                st.components.v1.html(styled_preview, height=800, scrolling=True)
+            if compare_mode:
+                st.subheader("🔀 Compare")
+                try: show_comparison(build_compare_variants(st.session_state.resume_data, template_name, compare_by, compare_colors))
+                except (RenderQueueFull, RenderSuperseded, TimeoutError) as e: st.warning(f"⏳ {e}")
+                except Exception as e: st.error(f"❌ An error occurred while rendering the comparison: {e}")
+            else:
+                st.subheader("📄 Preview")
+                preview_image = get_pdf_preview(html_out) if 'html_out' in locals() and html_out else None
+                if preview_image:
+                    st.image(preview_image, use_container_width=True)
+                elif 'html_out' in locals() and html_out:
+                    styled_preview = f'<div style="background-color:white; border-radius: 8px; padding: 25px; border: 1px solid #ddd;">{html_out}</div>'
+                    st.components.v1.html(styled_preview, height=800, scrolling=True)
     show_footer()
 
 elif page == "demo":
@@ -383,13 +556,8 @@ elif page == "demo":
     st.divider()
     def render_demo_card(col, template_name):
         with col:
-            filename, color = templates[template_name]
             st.subheader(f"'{template_name}' Style")
-            env = Environment(loader=FileSystemLoader(BASE_DIR))
-            template = env.get_template(filename)
-            html_out = template.render(sample_data, accent_color=color)
-            styled_demo = f'<div style="background-color:white; border-radius: 8px; padding: 25px; border: 1px solid #ddd;">{html_out}</div>'
-            st.components.v1.html(styled_demo, height=450, scrolling=True)
+            st.components.v1.html(get_demo_html(template_name), height=450, scrolling=True)
             st.link_button(f"Create with this Style →", f"?page=builder", use_container_width=True)
     row1_col1, row1_col2 = st.columns(2)
     render_demo_card(row1_col1, "Corporate"); render_demo_card(row1_col2, "Modern")
@@ -448,3 +616,5 @@ else: # Default page is "home"
     </div>
     """, unsafe_allow_html=True)
     show_footer()
+
+start_background_warmup()
@@ -0,0 +1,143 @@
+# --- START OF FILE batch_render.py (Headless bulk rendering of resume_data files to PDF) ---
+#
+# Usage:
+#   python batch_render.py cohort.jsonl resumes/ -o out/ --templates Classic Modern --workers 8 --report report.jsonl
+#
+# Inputs may be .json files (one resume_data object), .jsonl files (one per line), directories
+# of either, or "-" for JSONL on stdin. Every (resume, template) pair becomes one PDF written as
+# soon as it is rendered, and one JSON line in the report with its timings or its error.
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from renderer import AVAILABLE_CPUS, templates, render_html, render_pdf
+
+# --- Input ---
+def _items_from_jsonl(lines, source):
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip(): continue
+        item_id = f"{source}:{line_number}"
+        try: data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield item_id, None, f"Invalid JSON: {e}"
+            continue
+        yield str(data.get("id", item_id)) if isinstance(data, dict) else item_id, data, None
+
+def iter_resume_items(paths):
+    """Yields (item_id, resume_data, error) lazily, so large cohorts are never held in memory."""
+    for path in paths:
+        if path == "-":
+            yield from _items_from_jsonl(sys.stdin, "stdin")
+        elif os.path.isdir(path):
+            names = sorted(name for name in os.listdir(path) if name.endswith((".json", ".jsonl")))
+            yield from iter_resume_items([os.path.join(path, name) for name in names])
+        elif path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f: yield from _items_from_jsonl(f, os.path.basename(path))
+        else:
+            item_id = os.path.splitext(os.path.basename(path))[0]
+            try:
+                with open(path, encoding="utf-8") as f: yield item_id, json.load(f), None
+            except (OSError, json.JSONDecodeError) as e:
+                yield item_id, None, str(e)
+
+# --- Worker Side ---
+def _safe_filename(text): return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in text)
+
+def render_item(item_id, resume_data, template_name, out_dir, accent_color=None, file_stem=None):
+    """Renders one resume with one template to ``out_dir`` and returns its report row.
+
+    The PDF is written to ``<file_stem>_<template>.pdf``; ``file_stem`` defaults to the sanitized id.
+    """
+    row = {"id": item_id, "template": template_name, "ok": False}
+    started = time.perf_counter()
+    try:
+        if not isinstance(resume_data, dict): raise ValueError("resume_data must be a JSON object")
+        html_out = render_html(resume_data, template_name, accent_color)
+        rendered = time.perf_counter()
+        pdf_bytes = render_pdf(html_out)
+        finished = time.perf_counter()
+        path = os.path.join(out_dir, f"{file_stem or _safe_filename(item_id)}_{_safe_filename(template_name)}.pdf")
+        with open(path, "wb") as f: f.write(pdf_bytes)
+        row.update(ok=True, path=path, bytes=len(pdf_bytes),
+                   render_ms=round((rendered - started) * 1000, 2), pdf_ms=round((finished - rendered) * 1000, 2))
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return row
+
+# --- Python API ---
+def _unique_stem(item_id, taken):
+    # Ids that sanitize to the same name ("a/b" and "a_b", or same-named files from different
+    # directories) get a numeric suffix instead of overwriting each other's PDFs.
+    stem = base = _safe_filename(item_id)
+    counter = 2
+    while stem.lower() in taken:
+        stem = f"{base}-{counter}"
+        counter += 1
+    taken.add(stem.lower())
+    return stem
+
+def render_batch(items, out_dir, template_names=None, accent_color=None, workers=AVAILABLE_CPUS, max_in_flight=None):
+    """Renders (item_id, resume_data) pairs across a process pool and yields report rows as they finish.
+
+    Submission is bounded by ``max_in_flight`` (default ``4 * workers``), so ``items`` can be a
+    generator over millions of lines. Each item gets its own output name, so the ``path`` in its
+    report row is the way to match PDFs back to ids. Items that failed to load may be passed as
+    (item_id, None, error) triples and are reported without being rendered.
+    """
+    template_names = list(template_names or templates)
+    unknown = [name for name in template_names if name not in templates]
+    if unknown: raise ValueError(f"Unknown templates: {', '.join(unknown)}. Choose from: {', '.join(templates)}")
+    os.makedirs(out_dir, exist_ok=True)
+    max_in_flight = max_in_flight or 4 * workers
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        in_flight, taken = set(), set()
+        for item in items:
+            item_id, resume_data, error = item if len(item) == 3 else (*item, None)
+            if error is not None:
+                yield {"id": item_id, "template": None, "ok": False, "error": error}
+                continue
+            file_stem = _unique_stem(item_id, taken)
+            for template_name in template_names:
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done: yield future.result()
+                in_flight.add(pool.submit(render_item, item_id, resume_data, template_name, out_dir, accent_color, file_stem))
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done: yield future.result()
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render resume_data JSON/JSONL files to PDF with the ResumeCraft templates.")
+    parser.add_argument("inputs", nargs="+", help=".json/.jsonl files, directories of them, or - for JSONL on stdin")
+    parser.add_argument("-o", "--out-dir", default="batch_output", help="directory for the generated PDFs")
+    parser.add_argument("-t", "--templates", nargs="+", default=list(templates), choices=list(templates), metavar="TEMPLATE",
+                        help=f"templates to render (default: all of {', '.join(templates)})")
+    parser.add_argument("--accent-color", help="accent color for every render (default: each template's own)")
+    parser.add_argument("-w", "--workers", type=int, default=AVAILABLE_CPUS, help="render processes (default: available CPUs)")
+    parser.add_argument("--report", help="write per-item JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = open(args.report, "w", encoding="utf-8") if args.report else sys.stdout
+    started, succeeded, failed = time.perf_counter(), 0, 0
+    try:
+        for row in render_batch(iter_resume_items(args.inputs), args.out_dir, args.templates, args.accent_color, args.workers):
+            report.write(json.dumps(row) + "\n")
+            report.flush()
+            if row["ok"]: succeeded += 1
+            else: failed += 1
+    finally:
+        if report is not sys.stdout: report.close()
+    elapsed = time.perf_counter() - started
+    print(f"Rendered {succeeded} PDFs ({failed} failed) in {elapsed:.1f}s "
+          f"({succeeded / elapsed if elapsed else 0:.1f} PDFs/s).", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# --- START OF FILE benchmarks/bench_templates.py (Template and PDF rendering benchmark) ---
+#
+# Usage:
+#   python benchmarks/bench_templates.py -o results.json
+#   python benchmarks/bench_templates.py --sizes 1 4 16 --templates Classic Modern --repeat 5 --baseline previous.json
+#
+# Every (template, size) case runs in its own fresh process so peak RSS is per case. Fonts are
+# served from the local bundle and remote URLs are refused, so the run never touches the network;
+# it refuses to start until every manifest font is in assets/fonts.
+
+import os
+import sys
+import copy
+import json
+import time
+import platform
+import argparse
+import resource
+import statistics
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from renderer import BASE_DIR, load_font_manifest, missing_fonts, sample_data, templates
+
+DEFAULT_SIZES = [1, 2, 4, 8, 16]
+
+# --- Synthetic Data ---
+def synthetic_resume(size):
+    """Grows sample_data linearly: ``size`` projects/jobs/degrees, more bullets each, 8 skills per step."""
+    base = copy.deepcopy(sample_data)
+    project, job, degree = base["projects"][0], base["experience"][0], base["education"][0]
+    bullets = (project["details"] + job["details"]) * (1 + size // 2)
+    base["profile_summary"] = " ".join([base["profile_summary"]] * max(1, size // 4))
+    base["skills"] = [f"{skill} {i}" if i else skill for i in range(size) for skill in sample_data["skills"]]
+    base["education"] = [dict(degree, year=str(2024 - i)) for i in range(max(1, size // 2))]
+    base["projects"] = [{"name": f"{project['name']} {i + 1}", "details": bullets[:2 + size]} for i in range(size)]
+    base["experience"] = [dict(job, company=f"{job['company']} {i + 1}", details=bullets[:1 + size]) for i in range(size)]
+    return base
+
+# --- One Case (runs in a fresh process) ---
+def run_case(template_name, size, repeat, warmup):
+    from weasyprint import HTML
+    from renderer import fetch_asset, get_font_config, get_template_registry
+    filename, color = templates[template_name]
+    data = synthetic_resume(size)
+    registry = get_template_registry()
+    jinja_times, layout_times, write_times = [], [], []
+    for iteration in range(warmup + repeat):
+        started = time.perf_counter()
+        html_out = registry.render(filename, data, accent_color=color)
+        rendered = time.perf_counter()
+        document = HTML(string=html_out, base_url=BASE_DIR + os.sep, url_fetcher=fetch_asset).render(font_config=get_font_config())
+        laid_out = time.perf_counter()
+        pdf_bytes = document.write_pdf()
+        written = time.perf_counter()
+        if iteration >= warmup:
+            jinja_times.append(rendered - started)
+            layout_times.append(laid_out - rendered)
+            write_times.append(written - laid_out)
+    def summary(samples):
+        ordered = sorted(samples)
+        return {"min_ms": round(ordered[0] * 1000, 3), "median_ms": round(statistics.median(ordered) * 1000, 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3)}
+    return {
+        "template": template_name, "size": size, "repeat": repeat,
+        "entries": len(data["projects"]) + len(data["experience"]) + len(data["education"]), "skills": len(data["skills"]),
+        "html_bytes": len(html_out.encode("utf-8")), "pages": len(document.pages), "pdf_bytes": len(pdf_bytes),
+        "jinja": summary(jinja_times), "layout": summary(layout_times), "write": summary(write_times),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,  # kilobytes on Linux
+    }
+
+# --- Reporting ---
+def environment():
+    def version(module):
+        try: return __import__(module).__version__
+        except Exception: return None
+    try: commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError: commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "weasyprint": version("weasyprint"), "jinja2": version("jinja2"), "git_commit": commit,
+            "fonts_bundled": len(load_font_manifest()) - len(missing_fonts()), "fonts_expected": len(load_font_manifest()),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+
+def compare_to_baseline(results, baseline):
+    # Prints the change in median layout+write time and PDF size for every case present in both runs.
+    previous = {(case["template"], case["size"]): case for case in baseline["results"]}
+    for case in results:
+        old = previous.get((case["template"], case["size"]))
+        if old is None: continue
+        new_ms = case["layout"]["median_ms"] + case["write"]["median_ms"]
+        old_ms = old["layout"]["median_ms"] + old["write"]["median_ms"]
+        print(f"{case['template']:>10} size {case['size']:>3}: pdf {old_ms:8.1f} -> {new_ms:8.1f} ms "
+              f"({(new_ms - old_ms) / old_ms * 100:+6.1f}%), {old['pdf_bytes']} -> {case['pdf_bytes']} bytes", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Jinja rendering and WeasyPrint layout/write per template and resume size.")
+    parser.add_argument("--templates", nargs="+", default=list(templates), choices=list(templates), metavar="TEMPLATE")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="synthetic resume sizes (entries per section)")
+    parser.add_argument("--repeat", type=int, default=5, help="measured iterations per case")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured iterations per case")
+    parser.add_argument("-o", "--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    # Missing fonts would render with system fallbacks, so the numbers would not describe production output.
+    missing = missing_fonts()
+    if missing:
+        parser.exit(2, f"Only {len(load_font_manifest()) - len(missing)}/{len(load_font_manifest())} fonts are bundled "
+                       f"(missing: {', '.join(missing)}); run `python renderer.py --fetch-fonts` first.\n")
+    env = environment()
+    results = []
+    # One case per child process, one at a time, so RSS and timings are not shared or contended.
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1) as pool:
+        for template_name in args.templates:
+            for size in args.sizes:
+                case = pool.submit(run_case, template_name, size, args.repeat, args.warmup).result()
+                results.append(case)
+                print(f"{template_name:>10} size {size:>3}: jinja {case['jinja']['median_ms']:7.2f} ms, "
+                      f"layout {case['layout']['median_ms']:8.1f} ms, write {case['write']['median_ms']:7.1f} ms, "
+                      f"{case['pages']} pages, {case['pdf_bytes']} bytes, peak RSS {case['peak_rss_kb'] // 1024} MB", file=sys.stderr)
+    report = {"environment": env, "results": results}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f: compare_to_baseline(results, json.load(f))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
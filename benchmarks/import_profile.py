@@ -0,0 +1,59 @@
+# --- START OF FILE benchmarks/import_profile.py (Import-time profile of the app's startup path) ---
+#
+# Usage:
+#   python benchmarks/import_profile.py -o import_profile.json
+#
+# Each module is imported in a fresh interpreter under `python -X importtime`, so every number is
+# a cold import. "startup" is what app.py imports before the first page is sent; "deferred" is
+# what it now loads on demand or in the background warm-up. Compare runs to catch a heavy
+# dependency creeping back into the startup path.
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_MODULES = ["streamlit", "dotenv", "feedback", "generation_cache", "metrics", "renderer"]
+DEFERRED_MODULES = ["cohere", "pydantic", "resume_json", "generation", "jinja2", "weasyprint", "gspread", "google.oauth2.service_account", "pypdfium2"]
+
+def profile_import(module_name, top=10):
+    """Cold-imports ``module_name`` and returns its total time and the heaviest modules it pulled in."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+                            cwd=BASE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"module": module_name, "error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"}
+    entries = []
+    for line in result.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line: continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    total = next((entry["cumulative_ms"] for entry in reversed(entries) if entry["module"] == module_name),
+                 max((entry["cumulative_ms"] for entry in entries), default=0.0))
+    heaviest = sorted(entries, key=lambda entry: entry["self_ms"], reverse=True)[:top]
+    return {"module": module_name, "cumulative_ms": total, "modules_loaded": len(entries), "heaviest_self_ms": heaviest}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report cold import times for app.py's startup and deferred dependencies.")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    parser.add_argument("--top", type=int, default=10, help="heaviest sub-imports to list per module")
+    args = parser.parse_args(argv)
+
+    report = {"python": sys.version.split()[0], "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "startup": [], "deferred": []}
+    for group, modules in (("startup", STARTUP_MODULES), ("deferred", DEFERRED_MODULES)):
+        for module_name in modules:
+            entry = profile_import(module_name, args.top)
+            report[group].append(entry)
+            print(f"{group:>8} {module_name:<32} " + (f"{entry['cumulative_ms']:8.1f} ms" if "error" not in entry else entry["error"]), file=sys.stderr)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
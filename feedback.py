@@ -0,0 +1,134 @@
+# --- START OF FILE feedback.py (Spooled, batched feedback delivery to Google Sheets) ---
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FEEDBACK_SPOOL_PATH = os.getenv("FEEDBACK_SPOOL_PATH", os.path.join(BASE_DIR, ".cache", "feedback_spool.sqlite3"))
+FEEDBACK_FLUSH_INTERVAL = float(os.getenv("FEEDBACK_FLUSH_INTERVAL", 10))
+FEEDBACK_BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", 100))
+FEEDBACK_MAX_BACKOFF = float(os.getenv("FEEDBACK_MAX_BACKOFF", 600))
+SHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+
+# --- Spool ---
+class FeedbackSpool:
+    """Append-only local queue of feedback rows; rows are deleted only after a sink has accepted them."""
+
+    def __init__(self, path=FEEDBACK_SPOOL_PATH):
+        if path != ":memory:": os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS feedback (id INTEGER PRIMARY KEY AUTOINCREMENT, row TEXT NOT NULL, created REAL NOT NULL)")
+
+    def append(self, row):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO feedback (row, created) VALUES (?, ?)", (json.dumps(row), time.time()))
+
+    def peek(self, limit):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, row FROM feedback ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [(row_id, json.loads(row)) for row_id, row in rows]
+
+    def remove(self, row_ids):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM feedback WHERE id = ?", [(row_id,) for row_id in row_ids])
+
+    def __len__(self):
+        with self._lock: return self._conn.execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+
+# --- Sinks ---
+class SheetsSink:
+    """Appends rows to a worksheet, keeping one authorized client for the life of the process."""
+
+    def __init__(self, credentials_info, spreadsheet="ResumeCraft-Feedback", worksheet="Sheet1"):
+        self.credentials_info = dict(credentials_info)
+        self.spreadsheet = spreadsheet
+        self.worksheet = worksheet
+        self._sheet = None
+
+    def _get_sheet(self):
+        if self._sheet is None:
+            import gspread
+            from google.oauth2.service_account import Credentials
+            creds = Credentials.from_service_account_info(self.credentials_info, scopes=SHEETS_SCOPES)
+            self._sheet = gspread.authorize(creds).open(self.spreadsheet).worksheet(self.worksheet)
+        return self._sheet
+
+    def append_rows(self, rows): self._get_sheet().append_rows(rows, value_input_option="RAW")
+
+    def reset(self): self._sheet = None
+
+class JsonlSink:
+    """Local stand-in for the Sheets sink: appends each row as a JSON line."""
+
+    def __init__(self, path=os.path.join(BASE_DIR, ".cache", "feedback.jsonl")):
+        self.path = path
+
+    def append_rows(self, rows):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for row in rows: f.write(json.dumps(row) + "\n")
+
+    def reset(self): pass
+
+# --- Pipeline ---
+class FeedbackPipeline:
+    """Accepts feedback into the spool immediately; a daemon thread flushes it to the sink in batches.
+
+    A failed flush leaves the rows in the spool and retries with exponential backoff, up to
+    ``max_backoff`` seconds between attempts.
+    """
+
+    def __init__(self, sink, spool=None, flush_interval=FEEDBACK_FLUSH_INTERVAL,
+                 batch_size=FEEDBACK_BATCH_SIZE, max_backoff=FEEDBACK_MAX_BACKOFF):
+        self.sink = sink
+        self.spool = spool or FeedbackSpool()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="feedback-flusher", daemon=True)
+        self._thread.start()
+        if len(self.spool): self._wake.set()  # Rows left over from a previous run.
+
+    def submit(self, row):
+        with metrics.span("feedback_submit"): self.spool.append(row)
+        self._wake.set()
+
+    def flush(self):
+        """Sends everything in the spool; returns the number of rows delivered. Raises on sink errors."""
+        delivered = 0
+        while True:
+            batch = self.spool.peek(self.batch_size)
+            if not batch: return delivered
+            with metrics.span("feedback_flush", sink=type(self.sink).__name__):
+                self.sink.append_rows([row for _, row in batch])
+            self.spool.remove([row_id for row_id, _ in batch])
+            metrics.inc("feedback_rows_flushed_total", len(batch))
+            delivered += len(batch)
+
+    def _run(self):
+        while True:
+            # Waiting out the interval after a wake-up lets rows submitted close together go out as one batch.
+            self._wake.wait()
+            time.sleep(self.flush_interval if not self.failures else min(self.flush_interval * 2 ** self.failures, self.max_backoff))
+            self._wake.clear()
+            try:
+                self.flush()
+                self.failures = 0
+            except Exception:
+                self.failures += 1
+                self.sink.reset()
+                self._wake.set()
+                logger.exception("Feedback flush failed (attempt %d); %d rows remain spooled.", self.failures, len(self.spool))
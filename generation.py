@@ -0,0 +1,259 @@
+# --- START OF FILE generation.py (Section-level resume generation) ---
+
+import os
+import re
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import metrics, record_tokens
+from resume_json import IncrementalJSONParser, StreamParseError, loads_json, validate_resume
+
+# --- Configuration ---
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", 6))
+# Once a streamed reply is known to be malformed, at most this many more characters are read so a fault
+# near the end (a trailing comma) can still be repaired; past that the stream is abandoned and the error raised.
+STREAM_REPAIR_WINDOW = int(os.getenv("STREAM_REPAIR_WINDOW", 2000))
+
+# --- Splitting the User's Input ---
+BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+# "ResumeCraft: built X" or "ResumeCraft - built X": a short name, a separator, then a description.
+NAMED_LINE_RE = re.compile(r"^\s*[^:\n]{1,60}?(?P<sep>:|\s[-–—]\s)\s*\S")
+
+def split_entries(text, named_lines=False):
+    """Splits a projects/experience text area into entries.
+
+    Entries are separated by blank lines; without blank lines, a non-bullet line that follows
+    bullet lines starts a new entry. With ``named_lines`` (projects only), a single block of two
+    or more plain lines that all share one "Name: description" shape is one entry per line;
+    anything else stays one entry, since the lines may be a title followed by its description.
+    """
+    entries, current, seen_bullet, any_bullet = [], [], False, False
+    for line in (text or "").replace("\r\n", "\n").split("\n"):
+        if not line.strip():
+            if current: entries.append("\n".join(current))
+            current, seen_bullet = [], False
+            continue
+        is_bullet = bool(BULLET_RE.match(line))
+        if current and seen_bullet and not is_bullet:
+            entries.append("\n".join(current))
+            current, seen_bullet = [], False
+        current.append(line.rstrip())
+        seen_bullet = seen_bullet or is_bullet
+        any_bullet = any_bullet or is_bullet
+    if current: entries.append("\n".join(current))
+    if named_lines and len(entries) == 1 and not any_bullet:
+        lines = entries[0].split("\n")
+        separators = {match["sep"].strip() if match else None for match in map(NAMED_LINE_RE.match, lines)}
+        if len(lines) > 1 and len(separators) == 1 and None not in separators: return lines
+    return entries
+
+# --- Local Parsing of Structured Fields ---
+# The builder asks for "Degree - Institution - Year" lines and comma-separated skills; well-formed
+# input is parsed here, and only what does not fit goes to the model.
+YEAR_PATTERN = r"(?:(?:Expected|Class of)\s+)?(?:(?:19|20)\d{2}|Present)(?:\s*[-–]\s*(?:(?:19|20)\d{2}|Present))?"
+EDUCATION_LINE_RE = re.compile(rf"^(?P<degree>[^|]+?)\s+[-–—|]\s+(?P<institution>[^|]+?)\s+[-–—|]\s+(?P<year>{YEAR_PATTERN})$", re.IGNORECASE)
+MAX_SKILL_WORDS = 4
+
+def parse_education_line(line):
+    match = EDUCATION_LINE_RE.match(line.strip())
+    if not match or re.search(r"\s[-–—]\s", match["degree"] + " " + match["institution"]): return None
+    return {"degree": match["degree"], "institution": match["institution"], "year": match["year"]}
+
+def parse_education_input(text):
+    """Returns (entries, ambiguous): one slot per line, None where the line needs the model."""
+    entries, ambiguous = [], []
+    for line in (text or "").splitlines():
+        if not line.strip(): continue
+        entry = parse_education_line(BULLET_RE.sub("", line))
+        entries.append(entry)
+        if entry is None: ambiguous.append(line.strip())
+    return entries, ambiguous
+
+def parse_skills_input(text):
+    """Returns (skills, ambiguous) in the same shape as parse_education_input."""
+    skills, ambiguous, seen = [], [], set()
+    for item in re.split(r"[,\n]", text or ""):
+        item = BULLET_RE.sub("", item).strip()
+        if not item or item.lower() in seen: continue
+        seen.add(item.lower())
+        # "Languages: Python; Java" or a whole sentence is not a single skill name.
+        if len(item.split()) > MAX_SKILL_WORDS or any(mark in item for mark in ":;"):
+            skills.append(None)
+            ambiguous.append(item)
+        else:
+            skills.append(item)
+    return skills, ambiguous
+
+def fill_slots(local, model_values, flatten=False):
+    # Model results replace the None slots in order; with flatten, all model values go in the first open slot.
+    merged, remaining = [], list(model_values)
+    for value in local:
+        if value is not None: merged.append(value)
+        elif flatten: merged.extend(remaining); remaining = []
+        elif remaining: merged.append(remaining.pop(0))
+    return merged + remaining
+
+# --- Section Jobs ---
+# Each job is (section, index, inputs, prompt). The inputs dict is all the job depends on, so it doubles as its cache key.
+ENHANCE_RULES = "Rewrite each bullet point to be more professional, using strong action verbs and quantifying results where the input allows. Keep the user's facts; do not invent employers, numbers or technologies."
+
+def _targeting(user_data):
+    return {"target_role": user_data.get("target_role", ""), "job_description": user_data.get("job_description", "")}
+
+def summary_job(user_data):
+    inputs = dict(_targeting(user_data), skills_input=user_data.get("skills_input", ""),
+                  education_input=user_data.get("education_input", ""), projects_input=user_data.get("projects_input", ""),
+                  experience_input=user_data.get("experience_input", ""))
+    prompt = f"""
+    Write a concise, professional resume `profile_summary` (2-3 sentences) for this candidate, tailored to the `target_role` and `job_description` if provided.
+    The output MUST be a single JSON object enclosed in ```json ... ``` with the schema {{"profile_summary": "string"}}.
+
+    **Candidate's Details:**
+    {json.dumps(inputs, indent=2)}
+    """
+    return ("profile_summary", None, inputs, prompt)
+
+def education_skills_job(user_data):
+    # Only the lines the local parser could not handle are sent; None means no model call is needed.
+    _, ambiguous_education = parse_education_input(user_data.get("education_input", ""))
+    _, ambiguous_skills = parse_skills_input(user_data.get("skills_input", ""))
+    if not ambiguous_education and not ambiguous_skills: return None
+    inputs = {"education_lines": ambiguous_education, "skill_items": ambiguous_skills}
+    prompt = f"""
+    Parse these resume fragments into JSON.
+    1.  Parse each of `education_lines` into an object with `degree`, `institution`, and `year`. Preserve the order.
+    2.  Split `skill_items` into a simple list of individual skill names.
+    The output MUST be a single JSON object enclosed in ```json ... ``` with the schema
+    {{"education": [{{"degree": "string", "institution": "string", "year": "string"}}], "skills": ["string", ...]}}.
+
+    **Fragments:**
+    {json.dumps(inputs, indent=2)}
+    """
+    return ("education_skills", None, inputs, prompt)
+
+def project_job(user_data, index, entry):
+    inputs = dict(_targeting(user_data), entry=entry)
+    prompt = f"""
+    Turn this project description from a resume into JSON. {ENHANCE_RULES}
+    The output MUST be a single JSON object enclosed in ```json ... ``` with the schema {{"name": "string", "details": ["string", ...]}}.
+
+    **Project:**
+    {json.dumps(inputs, indent=2)}
+    """
+    return ("projects", index, inputs, prompt)
+
+def experience_job(user_data, index, entry):
+    inputs = dict(_targeting(user_data), entry=entry)
+    prompt = f"""
+    Turn this work experience description from a resume into JSON. {ENHANCE_RULES}
+    The output MUST be a single JSON object enclosed in ```json ... ``` with the schema
+    {{"title": "string", "company": "string", "duration": "string", "details": ["string", ...]}}.
+
+    **Experience:**
+    {json.dumps(inputs, indent=2)}
+    """
+    return ("experience", index, inputs, prompt)
+
+def build_section_jobs(user_data):
+    jobs = [summary_job(user_data)]
+    education_skills = education_skills_job(user_data)
+    if education_skills: jobs.append(education_skills)
+    jobs += [project_job(user_data, i, entry) for i, entry in enumerate(split_entries(user_data.get("projects_input", ""), named_lines=True))]
+    jobs += [experience_job(user_data, i, entry) for i, entry in enumerate(split_entries(user_data.get("experience_input", "")))]
+    return jobs
+
+# --- Streaming ---
+def stream_json_reply(client, prompt, model, temperature, on_update=None, section=None):
+    """Streams a reply into an IncrementalJSONParser and returns ``(parser, text, error)``.
+
+    Malformed JSON is detected as soon as it arrives. The reply is then read for at most
+    ``STREAM_REPAIR_WINDOW`` more characters: if it ends within that window, ``error`` is returned
+    with the full text so the caller can try ``loads_json``; otherwise the stream is abandoned and
+    the error raised. A reply that stops early (finish_reason other than COMPLETE) is also
+    returned with its ``error`` for the same repair attempt.
+    """
+    parser = IncrementalJSONParser()
+    chunks, error, read_after_error = [], None, 0
+    started, first_token = time.perf_counter(), None
+    with metrics.span("ai_chat", section=section):
+        for event in client.chat_stream(model=model, message=prompt, temperature=temperature):
+            if event.event_type == "text-generation":
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                    metrics.observe("ai_first_token_seconds", first_token, section=section)
+                chunks.append(event.text)
+                if error is not None:
+                    read_after_error += len(event.text)
+                    if read_after_error > STREAM_REPAIR_WINDOW: raise error
+                    continue
+                try:
+                    if parser.feed(event.text) and on_update: on_update(parser.result)
+                except StreamParseError as e: error = e
+            elif event.event_type == "stream-end":
+                record_tokens("ai_chat", getattr(getattr(event, "response", None), "meta", None), prompt, section=section)
+                if event.finish_reason != "COMPLETE" and error is None: error = RuntimeError(f"AI generation stopped early ({event.finish_reason}).")
+    return parser, "".join(chunks), error
+
+def parse_streamed_reply(parser, text, error):
+    # The incrementally parsed object when the stream was clean, otherwise one repair attempt on the whole reply.
+    if parser.done and error is None: return parser.result
+    try: return loads_json(text)
+    except ValueError:
+        if error is not None: raise error
+        raise
+
+# --- Running and Merging ---
+def run_section_job(client, prompt, model, temperature, section=None):
+    reply = stream_json_reply(client, prompt, model, temperature, section=section)
+    with metrics.span("json_extract", section=section): return parse_streamed_reply(*reply)
+
+def merge_sections(user_data, parts, project_count, experience_count):
+    resume = {"name": user_data.get("name", ""), "email": user_data.get("email", "")}
+    summary = parts.get(("profile_summary", None))
+    if summary is not None: resume["profile_summary"] = summary.get("profile_summary", "")
+    education, _ = parse_education_input(user_data.get("education_input", ""))
+    skills, _ = parse_skills_input(user_data.get("skills_input", ""))
+    parsed = parts.get(("education_skills", None)) or {}
+    resume["education"] = fill_slots(education, parsed.get("education", []))
+    # Case-insensitive, keeping the first spelling: "Java" typed by the user and "java" from the model are one skill.
+    resume["skills"], seen = [], set()
+    for skill in fill_slots(skills, parsed.get("skills", []), flatten=True):
+        if str(skill).lower() in seen: continue
+        seen.add(str(skill).lower())
+        resume["skills"].append(skill)
+    # Entries keep the user's order; a section still in progress simply has fewer entries.
+    resume["projects"] = [parts[("projects", i)] for i in range(project_count) if ("projects", i) in parts]
+    resume["experience"] = [parts[("experience", i)] for i in range(experience_count) if ("experience", i) in parts]
+    return resume
+
+def generate_resume_sections(client, user_data, model, temperature, prompt_version, cache=None, on_update=None):
+    """Generates the resume as independent section jobs run concurrently, then merges them.
+
+    With a ``cache``, each job is keyed on its own inputs, so only sections whose inputs changed
+    are sent to the model. ``on_update(resume_data)`` is called after every finished section.
+    """
+    jobs = build_section_jobs(user_data)
+    counts = {"projects": 0, "experience": 0}
+    for section, index, _, _ in jobs:
+        if section in counts: counts[section] += 1
+    parts, pending = {}, []
+    for section, index, inputs, prompt in jobs:
+        key = cache.key_for(inputs, f"{prompt_version}:{section}", model, temperature) if cache else None
+        cached = cache.get(key, scope=section) if cache else None
+        if cached is not None: parts[(section, index)] = cached
+        else: pending.append((section, index, key, prompt))
+
+    def snapshot(): return merge_sections(user_data, parts, counts["projects"], counts["experience"])
+    if parts and on_update: on_update(snapshot())
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(GENERATION_WORKERS, len(pending))) as pool:
+            futures = {pool.submit(run_section_job, client, prompt, model, temperature, section): (section, index, key)
+                       for section, index, key, prompt in pending}
+            for future in as_completed(futures):
+                section, index, key = futures[future]
+                parts[(section, index)] = future.result()
+                if cache: cache.put(key, parts[(section, index)])
+                if on_update: on_update(snapshot())
+    return validate_resume(snapshot())
@@ -0,0 +1,76 @@
+# --- START OF FILE generation_cache.py (Persistent cache of AI-generated resume data) ---
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+from metrics import metrics
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GENERATION_CACHE_PATH = os.getenv("GENERATION_CACHE_PATH", os.path.join(BASE_DIR, ".cache", "generations.sqlite3"))
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", 7 * 24 * 3600))
+GENERATION_CACHE_MAX_ENTRIES = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", 5000))
+
+def normalize_user_data(user_data):
+    # Whitespace-only edits (trailing spaces, CRLF, blank fields) should not cost a new generation.
+    normalized = {}
+    for field, value in user_data.items():
+        if isinstance(value, str):
+            value = "\n".join(line.strip() for line in value.replace("\r\n", "\n").split("\n")).strip()
+            if not value: continue
+        normalized[field] = value
+    return normalized
+
+class GenerationCache:
+    """SQLite-backed cache of generation results with a TTL and least-recently-used eviction."""
+
+    def __init__(self, path=GENERATION_CACHE_PATH, ttl=GENERATION_CACHE_TTL, max_entries=GENERATION_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        if path != ":memory:": os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS generations (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS generations_accessed ON generations (accessed)")
+
+    @staticmethod
+    def key_for(user_data, prompt_version, model, temperature):
+        payload = json.dumps({"user_data": normalize_user_data(user_data), "prompt_version": prompt_version,
+                              "model": model, "temperature": temperature}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key, scope="resume"):
+        # ``scope`` labels the lookup metric: "resume" for whole generations, the section name for section jobs.
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, created FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None: self._conn.execute("DELETE FROM generations WHERE key = ?", (key,))
+                self.misses += 1
+                metrics.inc("generation_cache_lookups_total", result="miss", scope=scope)
+                return None
+            self._conn.execute("UPDATE generations SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        metrics.inc("generation_cache_lookups_total", result="hit", scope=scope)
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO generations (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                               (key, json.dumps(value), now, now))
+            self._conn.execute("DELETE FROM generations WHERE created < ?", (now - self.ttl,))
+            self._conn.execute("DELETE FROM generations WHERE key IN (SELECT key FROM generations ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                               (self.max_entries,))
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+            return {"entries": entries, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,171 @@
+# --- START OF FILE metrics.py (Per-stage latency and size metrics for the generation and render pipeline) ---
+#
+# Stages are timed with ``metrics.span("stage", template=...)`` and aggregated into histograms.
+# Set METRICS_PORT to serve them in Prometheus text format at /metrics, and/or
+# METRICS_LOG_INTERVAL (seconds) to log a JSON snapshot periodically.
+
+import os
+import sys
+import json
+import time
+import bisect
+import logging
+import importlib
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_LOG_INTERVAL = os.getenv("METRICS_LOG_INTERVAL")
+METRICS_PREFIX = "resumecraft"
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+TOKEN_BUCKETS = (100, 250, 500, 1_000, 2_000, 4_000, 8_000, 16_000)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    """Thread-safe store of labelled histograms and counters."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels): return (name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None)))
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None: histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock: self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, stage, **labels):
+        # Records stage_seconds{stage=...}; failed calls are also counted in stage_errors_total. Only Exception
+        # counts as a failure: Streamlit's rerun/stop exceptions (BaseException) mean the user moved on.
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - started, stage=stage, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        return histograms, counters
+
+    def to_json(self):
+        histograms, counters = self.snapshot()
+        return {
+            "histograms": [{"name": name, "labels": dict(labels), "count": count, "sum": round(total, 6),
+                            "mean": round(total / count, 6) if count else None}
+                           for (name, labels), (_, _, total, count) in sorted(histograms.items())],
+            "counters": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in sorted(counters.items())],
+        }
+
+    def render_prometheus(self):
+        histograms, counters = self.snapshot()
+        lines, typed = [], set()
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+        for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            metric = f"{METRICS_PREFIX}_{name}"
+            if metric not in typed: lines.append(f"# TYPE {metric} histogram"); typed.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_sum{fmt(labels)} {total}")
+            lines.append(f"{metric}_count{fmt(labels)} {count}")
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{METRICS_PREFIX}_{name}"
+            if metric not in typed: lines.append(f"# TYPE {metric} counter"); typed.add(metric)
+            lines.append(f"{metric}{fmt(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+def record_tokens(stage, response_meta, prompt=None, **labels):
+    # Uses the provider's billed token counts when present, otherwise a rough 4-characters-per-token estimate.
+    billed = getattr(response_meta, "billed_units", None)
+    input_tokens = getattr(billed, "input_tokens", None)
+    output_tokens = getattr(billed, "output_tokens", None)
+    if input_tokens is None and prompt is not None: input_tokens = len(prompt) / 4
+    if input_tokens is not None: metrics.observe("prompt_tokens", input_tokens, TOKEN_BUCKETS, stage=stage, **labels)
+    if output_tokens is not None: metrics.observe("response_tokens", output_tokens, TOKEN_BUCKETS, stage=stage, **labels)
+
+def timed_import(module_name):
+    # importlib.import_module that records each module's first (cold) import as import_seconds.
+    if module_name in sys.modules: return sys.modules[module_name]
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    metrics.observe("import_seconds", time.perf_counter() - started, module=module_name)
+    return module
+
+# --- Exporters ---
+def start_http_exporter(port):
+    # http.server is imported here so the exporter costs nothing at startup unless METRICS_PORT is set.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] == "/metrics":
+                body, content_type = metrics.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+            elif self.path.split("?")[0] == "/metrics.json":
+                body, content_type = json.dumps(metrics.to_json()).encode("utf-8"), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args): pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
+
+def start_json_logger(interval):
+    def run():
+        while True:
+            time.sleep(float(interval))
+            logger.info("metrics %s", json.dumps(metrics.to_json()))
+    threading.Thread(target=run, name="metrics-logger", daemon=True).start()
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+def start_exporters_from_env():
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started: return
+        _exporters_started = True
+    if METRICS_PORT: start_http_exporter(METRICS_PORT)
+    if METRICS_LOG_INTERVAL: start_json_logger(METRICS_LOG_INTERVAL)
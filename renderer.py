@@ -0,0 +1,386 @@
+# --- START OF FILE renderer.py (Template and PDF rendering; importable without Streamlit) ---
+
+import io
+import os
+import json
+import hashlib
+import logging
+import importlib.util
+import threading
+import math
+import time
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, CancelledError, wait
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+def available_cpus():
+    """CPUs this process may actually use: its affinity mask, further limited by a cgroup v2 CPU quota
+    (``docker --cpus``, Kubernetes limits), which the affinity mask does not reflect."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 2)
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f: quota, period = f.read().split()[:2]
+        if quota != "max": cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError): pass
+    return cpus
+
+# Capped so one replica never starts more WeasyPrint processes than a few concurrent PDF requests need.
+AVAILABLE_CPUS = available_cpus()
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", min(AVAILABLE_CPUS, 4)))
+RENDER_QUEUE_DEPTH = int(os.getenv("RENDER_QUEUE_DEPTH", 2 * RENDER_WORKERS))
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", 60))
+RENDER_QUEUE_WAIT = float(os.getenv("RENDER_QUEUE_WAIT", 2))
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONTS_DIR = os.path.join(BASE_DIR, "assets", "fonts")
+# Remote URLs outside the font bundle are refused unless explicitly allowed, so renders never touch the network.
+ALLOW_REMOTE_ASSETS = os.getenv("ALLOW_REMOTE_ASSETS", "0") == "1"
+# Optional on-disk cache of compiled template bytecode, shared across processes and restarts.
+JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR")
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+PREVIEW_WIDTH = int(os.getenv("PREVIEW_WIDTH", 800))
+PREVIEW_PAGES = int(os.getenv("PREVIEW_PAGES", 2))
+# pypdfium2 is optional: without it, previews stay as HTML.
+HAS_RASTERIZER = importlib.util.find_spec("pypdfium2") is not None
+
+# Template name -> (file, default accent color)
+templates = {
+    "Corporate": ("template_oldmoney.html", "#8c7853"), "Modern": ("template_twocol.html", "#3498db"),
+    "Aesthetic": ("template_aesthetic.html", "#bcaaa4"), "Classic": ("template.html", "#2c3e50")
+}
+
+# Resume shown on the demo page; also the base shape for synthetic benchmark data.
+sample_data = {
+    "name": "Alex Taylor", "email": "alex.taylor@email.com",
+    "profile_summary": "Innovative Computer Science graduate passionate about developing scalable web applications and working with cutting-edge AI technologies.",
+    "education": [{"degree": "B.S. in Computer Science", "institution": "University of Technology", "year": "2024"}],
+    "skills": ["Python", "JavaScript", "React", "Node.js", "SQL", "Docker", "AWS", "Machine Learning"],
+    "projects": [{"name": "AI-Powered Task Manager", "details": ["Developed a full-stack web app that uses natural language processing to categorize and prioritize tasks.", "Built a RESTful API with Node.js and Express for data handling."]}],
+    "experience": [{"title": "Software Development Intern", "company": "Innovatech Solutions", "duration": "Summer 2023", "details": ["Contributed to the development of a client-facing analytics dashboard, increasing user engagement by 15%."]}]
+}
+
+def template_label(filename):
+    # Display name for a template file, used as the "template" label on metrics.
+    return next((name for name, (template_file, _) in templates.items() if template_file == filename), filename)
+
+class RenderQueueFull(Exception): pass
+class RenderSuperseded(Exception): pass
+
+# --- Template Registry ---
+class TemplateRegistry:
+    """Compiles every template once and recompiles a template only when its file's mtime changes."""
+
+    def __init__(self, filenames, search_path=BASE_DIR, bytecode_cache_dir=JINJA_BYTECODE_CACHE_DIR):
+        # Jinja is imported here so that importing this module stays cheap for pages that never render.
+        from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+        self.search_path = search_path
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        # The registry owns caching and reloads, so Jinja's own template cache is disabled.
+        self._env = Environment(loader=FileSystemLoader(search_path), bytecode_cache=bytecode_cache, cache_size=0, auto_reload=False)
+        self._templates = {}
+        self._lock = threading.Lock()
+        for filename in filenames: self._compile(filename)
+
+    def _mtime(self, filename): return os.path.getmtime(os.path.join(self.search_path, filename))
+
+    def _compile(self, filename):
+        mtime = self._mtime(filename)
+        template = self._env.loader.load(self._env, filename)
+        with self._lock: self._templates[filename] = (mtime, template)
+        return template
+
+    def get(self, filename):
+        entry = self._templates.get(filename)
+        if entry is None or entry[0] != self._mtime(filename): return self._compile(filename)
+        return entry[1]
+
+    def render(self, filename, data, **context):
+        # Labelled with the display name, like the pdf_render and pdf_bytes metrics, so per-template series line up.
+        with metrics.span("template_render", template=template_label(filename)): return self.get(filename).render(data, **context)
+
+    def version(self, filename):
+        # Changes whenever the template is recompiled; callers use it to invalidate derived caches.
+        self.get(filename)
+        return self._templates[filename][0]
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_template_registry():
+    # One registry per process, covering every entry in the templates dict.
+    global _registry
+    with _registry_lock:
+        if _registry is None: _registry = TemplateRegistry([filename for filename, _ in templates.values()])
+    return _registry
+
+def render_html(resume_data, template_name, accent_color=None):
+    filename, default_color = templates[template_name]
+    return get_template_registry().render(filename, resume_data, accent_color=accent_color or default_color)
+
+# --- PDF Cache ---
+# Keyed by a hash of the rendered HTML, so any change to resume_data, template or
+# accent color produces a new key while identical renders are served from memory.
+class PdfCache:
+    def __init__(self, max_bytes=PDF_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(html_string): return hashlib.sha256(html_string.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            pdf_bytes = self._entries.get(key)
+            if pdf_bytes is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pdf_bytes
+
+    def peek(self, key):
+        with self._lock: return self._entries.get(key)
+
+    def put(self, key, pdf_bytes):
+        if len(pdf_bytes) > self.max_bytes: return
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= len(self._entries.pop(key))
+            self._entries[key] = pdf_bytes
+            self.total_bytes += len(pdf_bytes)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.total_bytes, "hits": self.hits, "misses": self.misses}
+
+# --- Raster Previews ---
+def rasterize_pdf(pdf_bytes, width=PREVIEW_WIDTH, max_pages=PREVIEW_PAGES, image_format="WEBP"):
+    """Renders the first pages of a PDF, stacked vertically, to a compressed image at screen width."""
+    import pypdfium2
+    from PIL import Image
+    document = pypdfium2.PdfDocument(pdf_bytes)
+    try:
+        pages = []
+        for index in range(min(len(document), max_pages)):
+            page = document[index]
+            pages.append(page.render(scale=width / page.get_width()).to_pil().convert("RGB"))
+            page.close()
+    finally:
+        document.close()
+    sheet = Image.new("RGB", (max(page.width for page in pages), sum(page.height for page in pages)), "white")
+    top = 0
+    for page in pages:
+        sheet.paste(page, (0, top))
+        top += page.height
+    buffer = io.BytesIO()
+    if image_format == "WEBP": sheet.save(buffer, "WEBP", quality=80, method=4)
+    else: sheet.save(buffer, image_format, optimize=True)
+    return buffer.getvalue()
+
+# --- Local Asset Bundle ---
+# assets/fonts/manifest.json maps each font URL used by the templates to a vendored file.
+def load_font_manifest():
+    with open(os.path.join(FONTS_DIR, "manifest.json"), encoding="utf-8") as f: return json.load(f)
+
+def missing_fonts():
+    # Manifest fonts not present in assets/fonts; empty once `python renderer.py --fetch-fonts` has run.
+    return [filename for filename in load_font_manifest().values() if not os.path.exists(os.path.join(FONTS_DIR, filename))]
+
+_asset_bytes = {}
+_asset_lock = threading.Lock()
+
+def _load_asset(filename):
+    with _asset_lock:
+        data = _asset_bytes.get(filename)
+        if data is None:
+            with open(os.path.join(FONTS_DIR, filename), "rb") as f: data = f.read()
+            _asset_bytes[filename] = data
+        return data
+
+_font_manifest = None
+
+def fetch_asset(url, *args, **kwargs):
+    """WeasyPrint url_fetcher that serves bundled fonts from memory and refuses other remote URLs.
+
+    Rendering never downloads anything: a manifest font missing from assets/fonts fails here.
+    """
+    global _font_manifest
+    from weasyprint import default_url_fetcher
+    if _font_manifest is None: _font_manifest = load_font_manifest()
+    filename = _font_manifest.get(url)
+    if filename is not None:
+        try:
+            return {"string": _load_asset(filename), "mime_type": "font/woff2", "redirected_url": url}
+        except FileNotFoundError:
+            raise ValueError(f"Font {filename} is missing from the local bundle; run `python renderer.py --fetch-fonts`.")
+    if url.startswith(("http://", "https://")) and not ALLOW_REMOTE_ASSETS:
+        raise ValueError(f"Remote asset {url} is not in the local bundle.")
+    return default_url_fetcher(url, *args, **kwargs)
+
+def download_font_bundle():
+    # Required build step: populates assets/fonts from the manifest. Never called while rendering.
+    import urllib.request
+    for url, filename in load_font_manifest().items():
+        path = os.path.join(FONTS_DIR, filename)
+        if os.path.exists(path): continue
+        with urllib.request.urlopen(url, timeout=30) as response: data = response.read()
+        with open(path + ".part", "wb") as f: f.write(data)
+        os.replace(path + ".part", path)
+        print(f"Fetched {filename}")
+
+# --- Worker Side ---
+_font_config = None
+
+def get_font_config():
+    # One FontConfiguration per process, shared by every render in that process.
+    global _font_config
+    if _font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        _font_config = FontConfiguration()
+    return _font_config
+
+def render_pdf(html_string):
+    # Runs inside a pool process; WeasyPrint is imported there, not in the Streamlit thread.
+    from weasyprint import HTML
+    return HTML(string=html_string, base_url=BASE_DIR + os.sep, url_fetcher=fetch_asset).write_pdf(font_config=get_font_config())
+
+def warm_worker(_=None):
+    # Pays a worker's one-off costs (WeasyPrint import, font configuration) before the first real job.
+    importlib.import_module("weasyprint")
+    get_font_config()
+    return os.getpid()
+
+# --- Render Service ---
+class RenderService:
+    """Process pool for WeasyPrint jobs with a bounded queue and per-session supersession.
+
+    At most ``workers + queue_depth`` jobs are in flight; past that, ``submit`` waits up to
+    ``queue_wait`` seconds for a slot and then raises ``RenderQueueFull``. Submitting a new job
+    under a ``session_key`` first cancels that session's previous job if it has not started yet,
+    so a superseded job never holds a slot the new one needs.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, queue_depth=RENDER_QUEUE_DEPTH,
+                 timeout=RENDER_TIMEOUT, queue_wait=RENDER_QUEUE_WAIT):
+        self.workers = workers
+        self.timeout = timeout
+        self.queue_wait = queue_wait
+        # "spawn" keeps the workers clear of the Streamlit server's threads and locks.
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        # Queued jobs wait here, not in the executor: it marks the calls it has queued internally as
+        # running, and a running future can no longer be cancelled.
+        self._queue = deque()
+        self._running = 0
+        self._latest = {}
+        self._lock = threading.Lock()
+        missing = missing_fonts()
+        if missing: logger.error("%d template fonts are missing from assets/fonts and will render with system fonts; "
+                                 "run `python renderer.py --fetch-fonts` at build time.", len(missing))
+
+    def submit(self, html_string, session_key=None, job=render_pdf):
+        if session_key is not None:
+            with self._lock: previous = self._latest.get(session_key)
+            # A job already running cannot be interrupted; it finishes and its slot frees itself.
+            if previous is not None: previous.cancel()
+        if not self._slots.acquire(timeout=self.queue_wait):
+            raise RenderQueueFull("All PDF render workers are busy. Please try again in a moment.")
+        future = Future()
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            if session_key is not None: self._latest[session_key] = future
+            self._queue.append((future, job, html_string))
+        self._dispatch()
+        return future
+
+    def _dispatch(self):
+        # Hands queued jobs to the executor while a worker is free, skipping any cancelled meanwhile.
+        started = []
+        with self._lock:
+            while self._running < self.workers and self._queue:
+                future, job, html_string = self._queue.popleft()
+                if not future.set_running_or_notify_cancel(): continue
+                try: inner = self._executor.submit(job, html_string)
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                self._running += 1
+                started.append((inner, future))
+        # Outside the lock: a job that has already finished runs its callback, and so _finish, right here.
+        for inner, future in started: inner.add_done_callback(lambda inner, future=future: self._finish(inner, future))
+
+    def _finish(self, inner, future):
+        with self._lock: self._running -= 1
+        if inner.cancelled(): future.set_exception(CancelledError())  # Only on shutdown.
+        elif inner.exception() is not None: future.set_exception(inner.exception())
+        else: future.set_result(inner.result())
+        self._dispatch()
+
+    def render(self, html_string, session_key=None, timeout=None, on_wait=None, poll_interval=0.25, job=render_pdf):
+        """Submit a job and block until it finishes, calling ``on_wait(elapsed, timeout)`` while waiting."""
+        return self._gather([(html_string, session_key, job)], timeout or self.timeout, on_wait, poll_interval)[0]
+
+    def render_many(self, html_strings, session_key=None, on_wait=None, poll_interval=0.25, job=render_pdf):
+        """Renders each variant as its own job, so up to ``workers`` of them run in parallel; results keep input order."""
+        html_strings = list(html_strings)
+        keys = [f"{session_key}:{i}" if session_key is not None else None for i in range(len(html_strings))]
+        # The variants queue behind each other only once every worker is busy.
+        timeout = self.timeout * max(1, -(-len(html_strings) // self.workers))
+        return self._gather([(html_string, key, job) for html_string, key in zip(html_strings, keys)], timeout, on_wait, poll_interval)
+
+    def _gather(self, jobs, timeout, on_wait, poll_interval):
+        # Submits (html, session_key, job) triples and waits for all of them. The finally also covers timeouts,
+        # a full queue and exceptions raised by on_wait (e.g. a Streamlit rerun): jobs that have not started
+        # are cancelled, and no abandoned future is left holding its PDF in _latest.
+        futures, keys = [], []
+        started = time.monotonic()
+        try:
+            for html_string, session_key, job in jobs:
+                futures.append(self.submit(html_string, session_key, job))
+                keys.append(session_key)
+            while True:
+                _, pending = wait(futures, timeout=poll_interval)
+                if not pending: break
+                elapsed = time.monotonic() - started
+                if elapsed >= timeout: raise TimeoutError(f"PDF rendering took longer than {timeout:g} seconds.")
+                if on_wait: on_wait(elapsed, timeout)
+            return [future.result() for future in futures]
+        except CancelledError:
+            raise RenderSuperseded("A newer render for this session replaced this one.")
+        except BaseException:
+            for future in futures: future.cancel()
+            raise
+        finally:
+            with self._lock:
+                for session_key, future in zip(keys, futures):
+                    if session_key is not None and self._latest.get(session_key) is future: del self._latest[session_key]
+
+    def warm_up(self, count=1):
+        # Workers are spawned on demand, so this starts ``count`` processes; the rest start with the first real jobs.
+        for _ in range(min(count, self.workers)): self._executor.submit(warm_worker)
+
+    def shutdown(self):
+        with self._lock:
+            for future, _, _ in self._queue: future.cancel()
+            self._queue.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+if __name__ == "__main__":
+    # Build step: `python renderer.py --fetch-fonts` vendors the bundle; `--check-fonts` fails the build if it is incomplete.
+    import sys
+    if "--fetch-fonts" in sys.argv: download_font_bundle()
+    if "--check-fonts" in sys.argv and missing_fonts():
+        sys.exit(f"Missing from assets/fonts: {', '.join(missing_fonts())}. Run `python renderer.py --fetch-fonts`.")
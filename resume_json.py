@@ -0,0 +1,226 @@
+# --- START OF FILE resume_json.py (Parsing the AI's resume JSON) ---
+
+import json
+from typing import List
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator, model_validator
+
+class StreamParseError(ValueError): pass
+
+# --- Resume Schema ---
+def _as_lines(value):
+    # The model sometimes returns bullet points as one newline-separated string.
+    if isinstance(value, str): return [line.strip() for line in value.splitlines() if line.strip()]
+    return value
+
+class _Section(BaseModel):
+    model_config = ConfigDict(extra="ignore", coerce_numbers_to_str=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def drop_nulls(cls, data):
+        # A null field falls back to its default instead of failing the whole resume.
+        return {key: value for key, value in data.items() if value is not None} if isinstance(data, dict) else data
+
+class Education(_Section):
+    degree: str = ""
+    institution: str = ""
+    year: str = ""
+
+class Project(_Section):
+    name: str = ""
+    details: List[str] = []
+
+    @field_validator("details", mode="before")
+    @classmethod
+    def split_details(cls, value): return _as_lines(value)
+
+class Experience(_Section):
+    title: str = ""
+    company: str = ""
+    duration: str = ""
+    details: List[str] = []
+
+    @field_validator("details", mode="before")
+    @classmethod
+    def split_details(cls, value): return _as_lines(value)
+
+class ResumeData(_Section):
+    name: str = ""
+    email: str = ""
+    profile_summary: str = ""
+    education: List[Education] = []
+    skills: List[str] = []
+    projects: List[Project] = []
+    experience: List[Experience] = []
+
+    @field_validator("skills", mode="before")
+    @classmethod
+    def split_skills(cls, value): return _as_lines(value)
+
+def validate_resume(data):
+    """Checks parsed resume data against the resume_data schema and returns it as plain dicts."""
+    try: return ResumeData.model_validate(data).model_dump()
+    except ValidationError as e: raise ValueError(f"AI response does not match the resume format: {e.errors()[0]['msg']}")
+
+# --- Extraction and Repair ---
+def find_json_block(text):
+    """Returns the outermost JSON object in ``text``, found in one brace- and string-aware pass.
+
+    A ```json fence is preferred when present. If the object never closes (a truncated
+    response), everything from its opening brace is returned so ``repair_json`` can close it.
+    """
+    fence = text.find("```json")
+    start = text.find("{", fence if fence != -1 else 0)
+    if start == -1: start = text.find("{")
+    if start == -1: return None
+    depth, in_string, escape = 0, False, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape: escape = False
+            elif ch == "\\": escape = True
+            elif ch == '"': in_string = False
+        elif ch == '"': in_string = True
+        elif ch in "{[": depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0: return text[start:i + 1]
+    return text[start:].rstrip().removesuffix("```").rstrip()
+
+def repair_json(fragment):
+    """Drops trailing commas and closes a truncated object, cutting back to the last complete value if needed."""
+    out, stack, cuts = [], [], []
+    in_string, escape = False, False
+    for ch in fragment:
+        if in_string:
+            out.append(ch)
+            if escape: escape = False
+            elif ch == "\\": escape = True
+            elif ch == '"': in_string = False
+            continue
+        if ch in "}]":
+            while out and (out[-1].isspace() or out[-1] == ","): out.pop()
+            if stack: stack.pop()
+        elif ch == ",":
+            cuts.append((len(out), list(stack)))
+        out.append(ch)
+        if ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            cuts.append((len(out), list(stack)))
+        elif ch == '"': in_string = True
+    text = "".join(out)
+    if in_string: text = text.removesuffix("\\") + '"'
+    candidates = [(text.rstrip().rstrip(","), stack)] + [(text[:cut], open_stack) for cut, open_stack in reversed(cuts)]
+    for candidate, open_stack in candidates:
+        try: return json.loads(candidate + "".join(reversed(open_stack)))
+        except json.JSONDecodeError: continue
+    raise ValueError("The AI response is not valid JSON and could not be repaired.")
+
+def loads_json(text):
+    # json.loads on the extracted object, falling back to repair for common faults.
+    json_string = find_json_block(text)
+    if json_string is None: raise ValueError("Could not find a JSON object in the AI response.")
+    try: return json.loads(json_string)
+    except json.JSONDecodeError: return repair_json(json_string)
+
+def parse_resume_json(text): return validate_resume(loads_json(text))
+
+# --- Incremental Parser ---
+class IncrementalJSONParser:
+    """Parses the outermost JSON object of a streamed response as its text arrives.
+
+    ``feed`` returns the top-level keys whose values changed: a key is reported once its value
+    is complete, and an array-valued key is also reported after each finished element, so
+    sections like ``projects`` grow one entry at a time in ``result``. Malformed input raises
+    ``StreamParseError`` as soon as it is seen rather than after the whole response.
+    """
+
+    def __init__(self, max_preamble=2000):
+        self.text = ""
+        self.result = {}
+        self.done = False
+        self.max_preamble = max_preamble
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = "key"
+        self._key = None
+        self._token_start = None
+        self._array_key = None
+        self._elem_start = None
+
+    @staticmethod
+    def _loads(fragment):
+        try: return json.loads(fragment)
+        except json.JSONDecodeError as e: raise StreamParseError(f"Malformed JSON in AI response: {e.msg}: {fragment[:80]!r}")
+
+    def feed(self, chunk):
+        self.text += chunk
+        text = self.text
+        updated = []
+        for i in range(self._pos, len(text)):
+            if self.done: break
+            ch = text[i]
+            if not self._started:
+                if ch == "{": self._started, self._depth, self._state = True, 1, "key"
+                elif i >= self.max_preamble: raise StreamParseError("No JSON object found at the start of the AI response.")
+                continue
+            if self._in_string:
+                if self._escape: self._escape = False
+                elif ch == "\\": self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._state == "key_string":
+                        self._key = self._loads(text[self._token_start:i + 1])
+                        self._state = "colon"
+                continue
+            if ch.isspace(): continue
+
+            if self._depth == 1:
+                if self._state == "key":
+                    if ch == '"': self._in_string, self._token_start, self._state = True, i, "key_string"
+                    elif ch == "}": self.done = True
+                    else: raise StreamParseError(f"Expected a key in AI response, found {ch!r}.")
+                elif self._state == "colon":
+                    if ch != ":": raise StreamParseError(f"Expected ':' in AI response, found {ch!r}.")
+                    self._state, self._token_start = "value", None
+                elif self._state == "value" and self._token_start is None:
+                    self._token_start = i
+                    if ch == '"': self._in_string = True
+                    elif ch in "{[":
+                        self._depth = 2
+                        if ch == "[":
+                            self._array_key, self._elem_start = self._key, None
+                            self.result[self._key] = []
+                elif ch in ",}":
+                    if self._state == "value":
+                        self.result[self._key] = self._loads(text[self._token_start:i])
+                        updated.append(self._key)
+                    self._state = "key"
+                    if ch == "}": self.done = True
+                elif self._state == "after_value":
+                    raise StreamParseError(f"Expected ',' or '}}' in AI response, found {ch!r}.")
+                continue
+
+            # Inside a nested value; only the boundaries of top-level array elements matter here.
+            in_array = self._depth == 2 and self._array_key is not None
+            if in_array and self._elem_start is None and ch not in ",]": self._elem_start = i
+            if ch == '"': self._in_string = True
+            elif ch in "{[": self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    if in_array and self._elem_start is not None:
+                        self.result[self._key].append(self._loads(text[self._elem_start:i]))
+                    self.result[self._key] = self._loads(text[self._token_start:i + 1])
+                    updated.append(self._key)
+                    self._state, self._array_key = "after_value", None
+            elif ch == "," and in_array:
+                if self._elem_start is None: raise StreamParseError("Empty array element in AI response.")
+                self.result[self._key].append(self._loads(text[self._elem_start:i]))
+                self._elem_start = None
+                updated.append(self._key)
+        self._pos = len(text)
+        return list(dict.fromkeys(updated))
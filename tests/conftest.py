@@ -0,0 +1,6 @@
+# --- START OF FILE tests/conftest.py (Makes the app's top-level modules importable from the tests) ---
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
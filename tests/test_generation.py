@@ -0,0 +1,66 @@
+# --- START OF FILE tests/test_generation.py (Local parsing of the builder's text inputs) ---
+
+import pytest
+
+from generation import merge_sections, parse_education_input, parse_education_line, parse_skills_input, split_entries
+
+# --- Education ---
+@pytest.mark.parametrize("line, expected", [
+    ("B.S. in Computer Science - University of Tech - 2024", ("B.S. in Computer Science", "University of Tech", "2024")),
+    ("M.Sc. Data Science – Oxford – 2020 – 2022", ("M.Sc. Data Science", "Oxford", "2020 – 2022")),
+    ("B.Tech | IIT Bombay | Expected 2025", ("B.Tech", "IIT Bombay", "Expected 2025")),
+    ("MBA - Harvard - Class of 2019", ("MBA", "Harvard", "Class of 2019")),
+    ("PhD - MIT - 2021 - Present", ("PhD", "MIT", "2021 - Present")),
+    ("b.s. - u of t - present", ("b.s.", "u of t", "present")),
+])
+def test_parse_education_line_formats(line, expected):
+    assert parse_education_line(line) == dict(zip(("degree", "institution", "year"), expected))
+
+@pytest.mark.parametrize("line", [
+    "B.A. - Yale",                                # no year
+    "High School - St. Mary's - Pune - 2018",     # more than three parts: which one is the institution?
+    "BSc Physics, Uni of X, 2019",                # not the requested separator
+])
+def test_parse_education_line_leaves_ambiguous_lines_to_the_model(line):
+    assert parse_education_line(line) is None
+
+def test_parse_education_input_keeps_a_slot_per_line():
+    entries, ambiguous = parse_education_input("- B.S. CS - Uni - 2024\n\nsomething odd\n")
+    assert entries == [{"degree": "B.S. CS", "institution": "Uni", "year": "2024"}, None]
+    assert ambiguous == ["something odd"]
+
+# --- Skills ---
+def test_parse_skills_input():
+    skills, ambiguous = parse_skills_input("Python, python, - Docker\nLanguages: Go; Rust, machine learning with very large models, SQL")
+    assert skills == ["Python", "Docker", None, None, "SQL"]
+    assert ambiguous == ["Languages: Go; Rust", "machine learning with very large models"]
+
+def test_merge_sections_deduplicates_skills_case_insensitively():
+    parts = {("education_skills", None): {"skills": ["Go", "java", "python", "Rust"]}}
+    resume = merge_sections({"skills_input": "Java, Python, Languages: Go; Java"}, parts, 0, 0)
+    assert resume["skills"] == ["Java", "Python", "Go", "Rust"]
+
+# --- Projects / Experience ---
+@pytest.mark.parametrize("text, expected", [
+    ("ProjA\ndesc A\n\nProjB\ndesc B", ["ProjA\ndesc A", "ProjB\ndesc B"]),
+    ("ProjA\n- a\n- b\nProjB\n1. c", ["ProjA\n- a\n- b", "ProjB\n1. c"]),
+    ("- did a\r\n- did b", ["- did a\n- did b"]),
+    ("Software Intern - Innovatech - Summer 2023\nBuilt the analytics dashboard",
+     ["Software Intern - Innovatech - Summer 2023\nBuilt the analytics dashboard"]),
+    ("ResumeCraft: built X\nChat App: built Y", ["ResumeCraft: built X\nChat App: built Y"]),
+    ("One project", ["One project"]),
+    ("", []),
+])
+def test_split_entries(text, expected):
+    assert split_entries(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("ResumeCraft: built X\nChat App: built Y", ["ResumeCraft: built X", "Chat App: built Y"]),
+    ("ResumeCraft - built X\nChat App - built Y", ["ResumeCraft - built X", "Chat App - built Y"]),
+    # A title followed by its description, or lines of mixed shapes, stay one project.
+    ("ResumeCraft AI\nStreamlit app that builds resumes", ["ResumeCraft AI\nStreamlit app that builds resumes"]),
+    ("ResumeCraft: built X\nChat App - built Y", ["ResumeCraft: built X\nChat App - built Y"]),
+    ("ResumeCraft AI\nStreamlit app\n\nChat App\nRealtime chat", ["ResumeCraft AI\nStreamlit app", "Chat App\nRealtime chat"]),
+])
+def test_split_entries_with_named_lines(text, expected):
+    assert split_entries(text, named_lines=True) == expected
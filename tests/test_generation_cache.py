@@ -0,0 +1,46 @@
+# --- START OF FILE tests/test_generation_cache.py (SQLite cache of AI generations) ---
+
+from generation_cache import GenerationCache
+from metrics import metrics
+
+def lookups(scope, result):
+    return next((counter["value"] for counter in metrics.to_json()["counters"]
+                 if counter["name"] == "generation_cache_lookups_total" and counter["labels"] == {"result": result, "scope": scope}), 0)
+
+def test_key_ignores_whitespace_only_edits():
+    a = GenerationCache.key_for({"name": "Alex ", "skills_input": "Python\r\nSQL", "job_description": ""}, "2:sections", "m", 0.2)
+    b = GenerationCache.key_for({"name": "Alex", "skills_input": "Python\nSQL"}, "2:sections", "m", 0.2)
+    assert a == b
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("generation_cache.time.time", lambda: now[0])
+    cache = GenerationCache(":memory:", ttl=60)
+    cache.put("k", {"name": "A"})
+    now[0] += 59
+    assert cache.get("k") == {"name": "A"}
+    now[0] += 2
+    assert cache.get("k") is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1}
+
+def test_max_entries_evicts_least_recently_used(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("generation_cache.time.time", lambda: now[0])
+    cache = GenerationCache(":memory:", max_entries=2)
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.put(key, key)
+    now[0] += 1
+    assert cache.get("a") == "a"  # "b" is now the least recently used.
+    now[0] += 1
+    cache.put("c", "c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" and cache.get("c") == "c"
+
+def test_lookups_are_counted_per_scope():
+    cache = GenerationCache(":memory:")
+    before = lookups("resume", "miss"), lookups("projects", "hit")
+    cache.get("missing")
+    cache.put("p", {"name": "P"})
+    cache.get("p", scope="projects")
+    assert (lookups("resume", "miss"), lookups("projects", "hit")) == (before[0] + 1, before[1] + 1)
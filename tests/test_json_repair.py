@@ -0,0 +1,44 @@
+# --- START OF FILE tests/test_json_repair.py (Extraction, repair and validation of the AI's resume JSON) ---
+
+import pytest
+
+from resume_json import find_json_block, loads_json, parse_resume_json, repair_json
+
+# --- Extraction ---
+def test_find_json_block_prefers_fence_and_ignores_braces_in_strings():
+    text = 'Sure {"x": 1}\n```json\n{"a": "}{", "b": [1, {"c": 2}]}\n```\nalso {"z": 0}'
+    assert find_json_block(text) == '{"a": "}{", "b": [1, {"c": 2}]}'
+
+def test_find_json_block_returns_the_open_tail_of_a_truncated_object():
+    assert find_json_block('```json\n{"a": [1, 2') == '{"a": [1, 2'
+    assert find_json_block("no json here") is None
+
+# --- Repair ---
+def test_repair_json_drops_trailing_commas():
+    assert repair_json('{"a": [1, 2,], "b": {"c": "x",},}') == {"a": [1, 2], "b": {"c": "x"}}
+
+@pytest.mark.parametrize("fragment, expected", [
+    ('{"name": "A", "skills": ["x", "y', {"name": "A", "skills": ["x", "y"]}),
+    ('{"name": "A", "projects": [{"name": "P", "details": ["a", "b', {"name": "A", "projects": [{"name": "P", "details": ["a", "b"]}]}),
+    ('{"name": "A", "summary":', {"name": "A"}),
+    ('{"name": "ends in \\', {"name": "ends in "}),
+])
+def test_repair_json_closes_truncated_objects(fragment, expected):
+    assert repair_json(fragment) == expected
+
+def test_repair_json_raises_when_nothing_can_be_recovered():
+    with pytest.raises(ValueError):
+        repair_json("not json")
+
+def test_loads_json_falls_back_to_repair():
+    assert loads_json('```json\n{"a": [1,],}\n```') == {"a": [1]}
+
+# --- Validation ---
+def test_parse_resume_json_normalizes_model_quirks():
+    text = '```json\n{"name": null, "education": [{"degree": "BS", "year": 2024}], "skills": "Python\\nSQL", "projects": [{"name": "P", "details": "a\\nb"}]}\n```'
+    resume = parse_resume_json(text)
+    assert resume["name"] == ""
+    assert resume["education"] == [{"degree": "BS", "institution": "", "year": "2024"}]
+    assert resume["skills"] == ["Python", "SQL"]
+    assert resume["projects"] == [{"name": "P", "details": ["a", "b"]}]
+    assert resume["experience"] == []
@@ -0,0 +1,61 @@
+# --- START OF FILE tests/test_render_service.py (Process-pool rendering: parallel variants, queueing, supersession, timeouts) ---
+#
+# time.sleep stands in for render_pdf: it is picklable, and its "html" argument is the job's duration.
+
+import time
+
+import pytest
+
+from renderer import RenderQueueFull, RenderService, RenderSuperseded
+
+@pytest.fixture
+def make_service():
+    services = []
+    def make(**kwargs):
+        service = RenderService(**kwargs)
+        service.warm_up(service.workers)
+        services.append(service)
+        return service
+    yield make
+    for service in services: service.shutdown()
+
+def test_render_many_runs_variants_in_parallel(make_service):
+    service = make_service(workers=3, queue_depth=3)
+    service.render_many([0.01] * 3, job=time.sleep)  # Let the warm-up jobs finish starting the workers.
+    started = time.monotonic()
+    assert service.render_many([1, 1, 1], session_key="s", job=time.sleep) == [None, None, None]
+    assert time.monotonic() - started < 2
+    assert service._latest == {}
+
+def test_submit_raises_queue_full_past_workers_plus_queue_depth(make_service):
+    service = make_service(workers=1, queue_depth=1, queue_wait=0.1)
+    service.submit(1, "a", job=time.sleep)
+    service.submit(1, "b", job=time.sleep)
+    with pytest.raises(RenderQueueFull):
+        service.submit(1, "c", job=time.sleep)
+
+def test_newer_job_supersedes_the_sessions_queued_job_even_when_full(make_service):
+    service = make_service(workers=1, queue_depth=1, queue_wait=0.1)
+    running = service.submit(0.5, "other", job=time.sleep)
+    queued = service.submit(0.5, "me", job=time.sleep)
+    newer = service.submit(0.01, "me", job=time.sleep)
+    assert queued.cancelled()
+    assert newer.result(timeout=5) is None
+    assert running.result(timeout=5) is None
+
+def test_render_of_a_superseded_job_raises_render_superseded(make_service):
+    service = make_service(workers=1, queue_depth=2)
+    service.submit(0.5, "other", job=time.sleep)
+    def supersede(elapsed, timeout): service.submit(0.01, "me", job=time.sleep)
+    with pytest.raises(RenderSuperseded):
+        service.render(0.01, "me", on_wait=supersede, poll_interval=0.05, job=time.sleep)
+
+def test_timeout_and_interrupted_waits_leave_no_latest_entry(make_service):
+    service = make_service(workers=1, queue_depth=2)
+    with pytest.raises(TimeoutError, match="0.3 seconds"):
+        service.render(1, "timed_out", timeout=0.3, poll_interval=0.05, job=time.sleep)
+    class Rerun(BaseException): pass
+    def rerun(elapsed, timeout): raise Rerun()
+    with pytest.raises(Rerun):
+        service.render(1, "rerun", on_wait=rerun, poll_interval=0.05, job=time.sleep)
+    assert service._latest == {}
@@ -0,0 +1,62 @@
+# --- START OF FILE tests/test_resume_json.py (Incremental parsing of the AI's streamed JSON) ---
+
+import json
+
+import pytest
+
+from resume_json import IncrementalJSONParser, StreamParseError
+
+RESUME = {
+    "name": "Alex \"AT\" Taylor",
+    "email": "alex@example.com",
+    "profile_summary": "Builds {fast} [web] apps, with \\ care.",
+    "skills": ["Python", "C++", "SQL"],
+    "projects": [{"name": "Parser } ]", "details": ["Wrote a \"streaming\" parser", "a,b,c"]},
+                 {"name": "Second", "details": []}],
+    "experience": [],
+}
+RESPONSE = "Here is your resume:\n```json\n" + json.dumps(RESUME, indent=2) + "\n```\nGood luck!"
+
+def feed_in_chunks(text, size):
+    parser, updates = IncrementalJSONParser(), []
+    for start in range(0, len(text), size): updates += parser.feed(text[start:start + size])
+    return parser, updates
+
+# --- Incremental Parser ---
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(RESPONSE)])
+def test_incremental_parser_is_independent_of_chunk_boundaries(size):
+    parser, updates = feed_in_chunks(RESPONSE, size)
+    assert parser.done
+    assert parser.result == RESUME
+    assert set(updates) == set(RESUME)
+
+def test_incremental_parser_reports_array_elements_as_they_finish():
+    parser = IncrementalJSONParser()
+    head, tail = RESPONSE.split('"name": "Second"')
+    parser.feed(head)
+    assert parser.result["projects"] == RESUME["projects"][:1]
+    assert "experience" not in parser.result
+    parser.feed('"name": "Second"' + tail)
+    assert parser.result["projects"] == RESUME["projects"]
+
+def test_incremental_parser_keeps_escaped_quotes_and_braces_inside_strings():
+    text = '{"a": "say \\"hi\\" {not a brace}", "b": ["]", "\\\\"], "c": {"d": "}"}}'
+    parser, _ = feed_in_chunks(text, 1)
+    assert parser.done
+    assert parser.result == json.loads(text)
+
+def test_incremental_parser_rejects_trailing_comma_mid_stream():
+    parser = IncrementalJSONParser()
+    with pytest.raises(StreamParseError):
+        parser.feed('{"a": [1, 2,], "b": 3}')
+
+def test_incremental_parser_on_truncated_input_keeps_completed_sections():
+    truncated = RESPONSE[:RESPONSE.index('"Second"')]
+    parser, _ = feed_in_chunks(truncated, 5)
+    assert not parser.done
+    assert parser.result["skills"] == RESUME["skills"]
+    assert parser.result["projects"] == RESUME["projects"][:1]
+
+def test_incremental_parser_gives_up_without_a_json_object():
+    with pytest.raises(StreamParseError):
+        IncrementalJSONParser(max_preamble=10).feed("No JSON in this reply at all.")
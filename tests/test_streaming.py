@@ -0,0 +1,51 @@
+# --- START OF FILE tests/test_streaming.py (Streaming AI replies through the incremental parser) ---
+
+from types import SimpleNamespace
+
+import pytest
+
+import generation
+from generation import parse_streamed_reply, run_section_job, stream_json_reply
+from resume_json import StreamParseError
+
+class FakeStreamClient:
+    """Replays ``text`` as chat_stream events of ``chunk`` characters and records how much was consumed."""
+
+    def __init__(self, text, finish_reason="COMPLETE", chunk=4):
+        self.text, self.finish_reason, self.chunk = text, finish_reason, chunk
+        self.sent = 0
+
+    def chat_stream(self, **kwargs):
+        for start in range(0, len(self.text), self.chunk):
+            self.sent = start + self.chunk
+            yield SimpleNamespace(event_type="text-generation", text=self.text[start:start + self.chunk])
+        yield SimpleNamespace(event_type="stream-end", finish_reason=self.finish_reason, response=None)
+
+def stream(client, **kwargs): return stream_json_reply(client, "prompt", "model", 0.2, **kwargs)
+
+def test_clean_reply_is_parsed_incrementally():
+    updates = []
+    parser, text, error = stream(FakeStreamClient('```json\n{"name": "P", "details": ["a", "b"]}\n```'), on_update=updates.append)
+    assert error is None and parser.done
+    assert parse_streamed_reply(parser, text, error) == {"name": "P", "details": ["a", "b"]}
+    assert updates
+
+def test_fault_near_the_end_is_repaired_from_the_whole_reply():
+    client = FakeStreamClient('{"name": "P", "details": ["a", "b",], "extra": 1}')
+    assert run_section_job(client, "prompt", "model", 0.2, section="projects") == {"name": "P", "details": ["a", "b"], "extra": 1}
+
+def test_truncated_reply_is_repaired():
+    client = FakeStreamClient('{"name": "P", "details": ["a", "b', finish_reason="MAX_TOKENS")
+    assert run_section_job(client, "prompt", "model", 0.2) == {"name": "P", "details": ["a", "b"]}
+
+def test_early_fault_abandons_the_stream(monkeypatch):
+    monkeypatch.setattr(generation, "STREAM_REPAIR_WINDOW", 20)
+    client = FakeStreamClient('{"skills": ["a",], "summary": "' + "x" * 1000 + '"}')
+    with pytest.raises(StreamParseError):
+        stream(client)
+    assert client.sent < 100
+
+def test_reply_without_json_raises():
+    client = FakeStreamClient("Sorry, I cannot help with that.")
+    with pytest.raises(ValueError):
+        run_section_job(client, "prompt", "model", 0.2)